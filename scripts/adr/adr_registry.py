@@ -0,0 +1,212 @@
+"""
+Registre des ADR générés.
+
+docs/governance/adr/registry.json mémorise, pour chaque ADR, numéro,
+titre, statut, nav_order, chemin et discussion d'origine, ainsi que le
+prochain numéro et le prochain nav_order libres : allouer un ADR ne
+relit plus aucun fichier du dossier. Le registre n'est reconstruit à partir des fichiers (glob +
+frontmatter) que s'il n'existe pas encore, ou sur demande (--rebuild).
+
+Toute modification se fait sous verrou exclusif (.registry.lock, à côté
+du registre) et le registre est réécrit atomiquement : deux générations
+concurrentes ne peuvent pas obtenir le même numéro.
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+import yaml
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows : pas de verrou inter-processus
+    fcntl = None
+
+REGISTRY_FILE = "registry.json"
+LOCK_FILE = ".registry.lock"
+REGISTRY_VERSION = 1
+
+ADR_FILE_PATTERN = re.compile(r'adr-(\d+)')
+TITLE_PREFIX = re.compile(r'^ADR-\d+\s*[–-]\s*')
+DISCUSSION_PATTERN = re.compile(r'^- \*\*Discussion\*\*: #(\d+)', re.MULTILINE)
+
+
+def read_frontmatter(text):
+    """Frontmatter YAML d'un texte markdown, {} s'il est absent ou invalide."""
+    parts = text.split("---", 2)
+    if len(parts) < 3:
+        return {}
+    try:
+        front = yaml.safe_load(parts[1])
+    except yaml.YAMLError:
+        return {}
+    return front if isinstance(front, dict) else {}
+
+
+def scan_adr_dir(adr_dir):
+    """
+    Reconstruit le registre en lisant tous les fichiers du dossier (ancien
+    calcul : numéro max des adr-*.md, nav_order max de tous les *.md).
+    """
+    adrs = []
+    max_order = 0
+    for path in sorted(adr_dir.glob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        front = read_frontmatter(text)
+        nav_order = front.get("nav_order")
+        if isinstance(nav_order, int):
+            max_order = max(max_order, nav_order)
+
+        match = ADR_FILE_PATTERN.search(path.stem)
+        if not path.name.startswith("adr-") or not match:
+            continue
+        discussion = DISCUSSION_PATTERN.search(text)
+        adrs.append({
+            "number": int(match.group(1)),
+            "title": TITLE_PREFIX.sub("", str(front.get("title", ""))),
+            "status": front.get("status"),
+            "nav_order": nav_order,
+            "path": path.name,
+            "discussion": int(discussion.group(1)) if discussion else None,
+        })
+
+    adrs.sort(key=lambda adr: adr["number"])
+    return {
+        "version": REGISTRY_VERSION,
+        "next_number": max((adr["number"] for adr in adrs), default=0) + 1,
+        "next_nav_order": max_order + 1,
+        "adrs": adrs,
+    }
+
+
+def write_registry(registry, path):
+    """Écriture atomique : fichier temporaire dans le même dossier, fsync, puis rename."""
+    fd, tmp = tempfile.mkstemp(prefix=".registry.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(registry, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class AdrRegistry:
+    """
+    Registre chargé sous verrou (voir locked) ; les modifications ne sont
+    écrites que par save().
+    """
+
+    def __init__(self, adr_dir, data):
+        self.adr_dir = Path(adr_dir)
+        self.data = data
+        # Discussion → dernière entrée, construit au premier assign
+        self._by_discussion = None
+
+    @property
+    def path(self):
+        return self.adr_dir / REGISTRY_FILE
+
+    @classmethod
+    def load(cls, adr_dir, rebuild=False):
+        """Registre existant, ou reconstruit depuis les fichiers (non enregistré)."""
+        adr_dir = Path(adr_dir)
+        path = adr_dir / REGISTRY_FILE
+        if not rebuild and path.exists():
+            return cls(adr_dir, json.loads(path.read_text(encoding="utf-8")))
+        return cls(adr_dir, scan_adr_dir(adr_dir))
+
+    @classmethod
+    @contextlib.contextmanager
+    def locked(cls, adr_dir, rebuild=False):
+        """Charge le registre sous verrou exclusif, libéré à la sortie du bloc."""
+        adr_dir = Path(adr_dir)
+        adr_dir.mkdir(parents=True, exist_ok=True)
+        with open(adr_dir / LOCK_FILE, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield cls.load(adr_dir, rebuild)
+
+    def peek(self):
+        """(prochain numéro, prochain nav_order), sans rien réserver."""
+        return self.data["next_number"], self.data["next_nav_order"]
+
+    def allocate(self, title, status, discussion=None):
+        """
+        Réserve le prochain numéro et le prochain nav_order. Un fichier
+        adr-NNNN.md ajouté à la main hors registre n'est jamais écrasé :
+        son numéro est sauté.
+
+        :return: entrée du registre (number, title, status, nav_order,
+                 path, discussion)
+        """
+        number, nav_order = self.peek()
+        while (self.adr_dir / f"adr-{number:04d}.md").exists():
+            number += 1
+
+        entry = {
+            "number": number,
+            "title": title,
+            "status": status,
+            "nav_order": nav_order,
+            "path": f"adr-{number:04d}.md",
+            "discussion": discussion,
+        }
+        self.data["adrs"].append(entry)
+        if self._by_discussion is not None and discussion is not None:
+            self._by_discussion[discussion] = entry
+        self.data["next_number"] = number + 1
+        self.data["next_nav_order"] = nav_order + 1
+        return entry
+
+    def assign(self, discussion, title, status):
+        """
+        Entrée de l'ADR issu de discussion : la dernière déjà enregistrée
+        (numéro et nav_order conservés, titre et statut mis à jour), sinon
+        une nouvelle allocation. Régénérer un ADR ne change pas son numéro.
+        """
+        if self._by_discussion is None:
+            self._by_discussion = {
+                entry["discussion"]: entry
+                for entry in self.data["adrs"] if entry.get("discussion") is not None
+            }
+
+        entry = self._by_discussion.get(discussion)
+        if entry is None:
+            return self.allocate(title, status, discussion)
+        entry["title"] = title
+        entry["status"] = status
+        return entry
+
+    def save(self):
+        write_registry(self.data, self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the ADR registry")
+    parser.add_argument("--adr-dir", default="docs/governance/adr")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the registry from the ADR files")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        with AdrRegistry.locked(args.adr_dir, rebuild=True) as registry:
+            registry.save()
+    else:
+        registry = AdrRegistry.load(args.adr_dir)
+
+    print(json.dumps(registry.data, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
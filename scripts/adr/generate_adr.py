@@ -3,11 +3,17 @@
 Generate ADR document from GitHub Discussion
 """
 import argparse
+import json
+import os
 import re
-import yaml
+from bisect import bisect_right
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from github import Github
+
+from github_graphql import GRAPHQL_URL, GraphQLSession, fetch_discussion, load_dump
+from section_index import SectionIndex
+from adr_registry import AdrRegistry
 
 ADR_DIR = Path("docs/governance/adr")
 ADR_TEMPLATE = """---
@@ -101,107 +107,83 @@ participants: {participants}
 | {date} | 1.0 | Initial ADR | {author} |
 """
 
-def get_next_adr_number():
-    """Get the next available ADR number"""
-    if not ADR_DIR.exists():
-        return 1
-    
-    existing = [
-        int(re.search(r'adr-(\d+)', f.stem).group(1))
-        for f in ADR_DIR.glob("adr-*.md")
-        if re.search(r'adr-(\d+)', f.stem)
-    ]
-    
-    return max(existing, default=0) + 1
+# Sous-sections des conséquences (le texte des conséquences seulement)
+POSITIVE_PATTERNS = [
+    re.compile(r"###?\s*Positive\s*:?\s*\n(.*?)(?=###|---|\Z)", re.DOTALL | re.IGNORECASE),
+    re.compile(r"\*\*Positive\*\*:?\s*\n(.*?)(?=\*\*|---|\Z)", re.DOTALL | re.IGNORECASE),
+    re.compile(r"Positive:\s*\n(.*?)(?=Negative|---|\Z)", re.DOTALL | re.IGNORECASE),
+]
+
+NEGATIVE_PATTERNS = [
+    re.compile(r"###?\s*Negative\s*:?\s*\n(.*?)(?=###|---|\Z)", re.DOTALL | re.IGNORECASE),
+    re.compile(r"\*\*Negative\*\*:?\s*\n(.*?)(?=\*\*|---|\Z)", re.DOTALL | re.IGNORECASE),
+    re.compile(r"Negative:\s*\n(.*?)(?=###|---|\Z)", re.DOTALL | re.IGNORECASE),
+]
+
+SIL_PATTERNS = [
+    re.compile(r"SIL\s*Level:?\s*(SIL\s*\d|None|N/A)", re.IGNORECASE),
+    re.compile(r"SIL:?\s*(\d)", re.IGNORECASE),
+    re.compile(r"SIL\s*(\d)", re.IGNORECASE),
+]
+
+# Requirements mentionnés (SR-XXX, REQ-XXX, HAZ-XXX) en une seule passe
+REQUIREMENT_PATTERN = re.compile(r'\b((?:SR|REQ|HAZ)-\d+)\b', re.IGNORECASE)
 
 def extract_section(text, section_name):
-    """Extract content from a markdown section with various patterns"""
-    
-    # Patterns pour détecter les sections
-    patterns = [
-        # Pattern avec ##
-        rf"##\s+{section_name}\s*\n(.*?)(?=\n##|\Z)",
-        # Pattern avec backticks
-        rf"`##\s+{section_name}`\s*\n(.*?)(?=\n`##|---|\Z)",
-        # Pattern inline
-        rf"\*\*{section_name}\*\*:?\s*\n(.*?)(?=\n\*\*|---|\Z)",
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-        if match:
-            content = match.group(1).strip()
-            if content and content != "Not documented":
-                return content
-    
-    return "Not documented"
+    """Extract content from a markdown section (see SectionIndex for the rules)"""
+    return SectionIndex(text).extract(section_name)
 
-def parse_discussion_content(discussion):
+def parse_discussion_content(discussion, verbose=True):
     """Parse discussion body and comments to extract ADR content"""
     
-    # Combiner le body principal et tous les commentaires
-    full_content = discussion.body or ""
-    
-    for comment in discussion.comments():
-        # Ajouter un séparateur pour distinguer les commentaires
-        full_content += f"\n\n--- Comment by {comment.user.login} ---\n\n{comment.body}"
-    
-    print(f"📝 Parsing {len(discussion.comments())} comments...")
+    # Commentaires matérialisés une fois, texte assemblé en un seul join
+    full_content = discussion.text()
+    comments = discussion.comments()
+    if verbose:
+        print(f"📝 Parsing {len(comments)} comments...")
+
+    # Un seul parcours du texte : toutes les sections sont lues dans l'index
+    sections = SectionIndex(full_content)
     
     # Extraire les sections principales
-    context = extract_section(full_content, "Context")
-    decision = extract_section(full_content, "Decision")
-    alternatives = extract_section(full_content, "Alternatives?")
-    consequences = extract_section(full_content, "Consequences")
+    context = sections.extract("Context")
+    decision = sections.extract("Decision")
+    alternatives = sections.extract("Alternatives?")
+    consequences = sections.extract("Consequences")
+    
+    consequences_name = "Consequences"
     
     # Si pas trouvé avec "Consequences", essayer "Consequences?"
     if consequences == "Not documented":
-        consequences = extract_section(full_content, "Consequences?")
+        consequences_name = "Consequences?"
+        consequences = sections.extract(consequences_name)
     
     # Parser les conséquences positives/négatives
-    pos_patterns = [
-        r"###?\s*Positive\s*:?\s*\n(.*?)(?=###|---|\Z)",
-        r"\*\*Positive\*\*:?\s*\n(.*?)(?=\*\*|---|\Z)",
-        r"Positive:\s*\n(.*?)(?=Negative|---|\Z)"
-    ]
-    
-    neg_patterns = [
-        r"###?\s*Negative\s*:?\s*\n(.*?)(?=###|---|\Z)",
-        r"\*\*Negative\*\*:?\s*\n(.*?)(?=\*\*|---|\Z)",
-        r"Negative:\s*\n(.*?)(?=###|---|\Z)"
-    ]
-    
     positive = "- To be documented"
     negative = "- To be documented"
     
-    for pattern in pos_patterns:
-        match = re.search(pattern, consequences, re.DOTALL | re.IGNORECASE)
+    for pattern in POSITIVE_PATTERNS:
+        match = pattern.search(consequences)
         if match:
             positive = match.group(1).strip()
             break
     
-    for pattern in neg_patterns:
-        match = re.search(pattern, consequences, re.DOTALL | re.IGNORECASE)
+    for pattern in NEGATIVE_PATTERNS:
+        match = pattern.search(consequences)
         if match:
             negative = match.group(1).strip()
             break
     
     # Extraire d'autres sections optionnelles
-    risks = extract_section(full_content, "Risks")
-    safety_impact_raw = extract_section(full_content, "Safety Impact")
-    implementation = extract_section(full_content, "Implementation")
-    verification = extract_section(full_content, "Verification")
+    risks = sections.extract("Risks")
+    safety_impact_raw = sections.extract("Safety Impact")
+    implementation = sections.extract("Implementation")
+    verification = sections.extract("Verification")
     
     # Extraire le SIL level de plusieurs façons
-    sil_patterns = [
-        r"SIL\s*Level:?\s*(SIL\s*\d|None|N/A)",
-        r"SIL:?\s*(\d)",
-        r"SIL\s*(\d)",
-    ]
-    
     sil_impact = "None"
-    for pattern in sil_patterns:
-        match = re.search(pattern, full_content, re.IGNORECASE)
+    for pattern in SIL_PATTERNS:
+        match = pattern.search(full_content)
         if match:
             sil_text = match.group(1)
             if "none" in sil_text.lower() or "n/a" in sil_text.lower():
@@ -213,32 +195,40 @@ def parse_discussion_content(discussion):
             break
     
     # Extraire les requirements mentionnés (SR-XXX, REQ-XXX, HAZ-XXX, etc.)
-    requirement_patterns = [
-        r'\b(SR-\d+)\b',
-        r'\b(REQ-\d+)\b',
-        r'\b(HAZ-\d+)\b',
-    ]
-    
-    requirements = set()
-    for pattern in requirement_patterns:
-        requirements.update(re.findall(pattern, full_content, re.IGNORECASE))
+    requirements = set(REQUIREMENT_PATTERN.findall(full_content))
     
-    requirements = list(requirements)
+    # Trié : même discussion → même document, quel que soit le processus
+    requirements = sorted(requirements)
     
     # Extraire les participants (commentateurs + auteur)
-    participants = list(set([
-        comment.user.login 
-        for comment in discussion.comments()
-    ] + [discussion.user.login]))
-    
-    print(f"✓ Context: {len(context)} chars")
-    print(f"✓ Decision: {len(decision)} chars")
-    print(f"✓ Alternatives: {len(alternatives)} chars")
-    print(f"✓ Positive consequences: {len(positive)} chars")
-    print(f"✓ Negative consequences: {len(negative)} chars")
-    print(f"✓ SIL Impact: {sil_impact}")
-    print(f"✓ Requirements: {requirements}")
-    print(f"✓ Participants: {participants}")
+    participants = sorted({comment.author for comment in comments} | {discussion.user.login})
+    
+    # Auteurs de chaque section, retrouvés par les offsets des commentaires
+    sources = {}
+    for key, section_name in (
+        ("context", "Context"),
+        ("decision", "Decision"),
+        ("alternatives", "Alternatives?"),
+        ("consequences", consequences_name),
+        ("risks", "Risks"),
+        ("safety_impact", "Safety Impact"),
+        ("implementation_notes", "Implementation"),
+        ("verification", "Verification"),
+    ):
+        span = sections.span(section_name)
+        if span:
+            sources[key] = discussion.authors_between(*span)
+    
+    if verbose:
+        print(f"✓ Context: {len(context)} chars")
+        print(f"✓ Decision: {len(decision)} chars")
+        print(f"✓ Alternatives: {len(alternatives)} chars")
+        print(f"✓ Positive consequences: {len(positive)} chars")
+        print(f"✓ Negative consequences: {len(negative)} chars")
+        print(f"✓ SIL Impact: {sil_impact}")
+        print(f"✓ Requirements: {requirements}")
+        print(f"✓ Participants: {participants}")
+        print(f"✓ Sources: {sources}")
     
     return {
         "context": context,
@@ -253,130 +243,82 @@ def parse_discussion_content(discussion):
         "sil_impact": sil_impact,
         "requirements": requirements,
         "participants": participants,
+        "sources": sources,
     }
 
+class Discussion:
+    """
+    Discussion GitHub : en-tête, puis commentaires matérialisés une seule
+    fois et assemblés en un seul texte dont on garde les offsets.
+    """
+
+    def __init__(self, data, pages):
+        self.title = data["title"]
+        self.body = data["body"]
+        self.user = type('User', (), {'login': data["author"]})()
+        self._pages = pages
+        self._comments = None
+        self._text = None
+        self._starts = None
+
+    def comments(self):
+        """Commentaires et réponses dans l'ordre (liste construite au premier appel)."""
+        if self._comments is None:
+            self._comments = [comment for page in self._pages for comment in page]
+        return self._comments
+
+    def text(self):
+        """
+        Body puis commentaires séparés par un en-tête d'auteur, en un seul
+        join ; renseigne start / end de chaque commentaire.
+        """
+        if self._text is None:
+            parts = [self.body or ""]
+            pos = len(parts[0])
+            self._starts = []
+
+            for comment in self.comments():
+                # Ajouter un séparateur pour distinguer les commentaires
+                header = f"\n\n--- Comment by {comment.author} ---\n\n"
+                self._starts.append(pos)
+                comment.start = pos + len(header)
+                comment.end = comment.start + len(comment.body)
+                parts.append(header)
+                parts.append(comment.body)
+                pos = comment.end
+
+            self._text = "".join(parts)
+        return self._text
+
+    def authors_between(self, start, end):
+        """Auteurs (ordre d'apparition) du texte [start, end) : body puis commentaires."""
+        self.text()
+        first = bisect_right(self._starts, start) - 1
+        last = bisect_right(self._starts, max(start, end - 1)) - 1
+
+        authors = [self.user.login] if first < 0 else []
+        for comment in self._comments[max(first, 0):last + 1]:
+            if comment.author not in authors:
+                authors.append(comment.author)
+        return authors
+
 def extract_issue_number_from_discussion(discussion):
     """Extract related issue number from discussion body"""
     match = re.search(r'\*\*Related Issue\*\*:\s*#(\d+)', discussion.body or "")
     return int(match.group(1)) if match else None
 
-def generate_adr_document(discussion_number, github_token, repo_name):
-    """Generate ADR document from discussion"""
-    
-    # Connexion à GitHub
-    g = Github(github_token)
-    repo = g.get_repo(repo_name)
-    
-    # Récupérer la discussion via GraphQL
-    # Note: PyGithub ne supporte pas nativement les discussions
-    # On doit utiliser l'API REST ou GraphQL directement
-    
-    # Pour simplifier, on va utiliser l'API REST via requests
-    import requests
-    
-    headers = {
-        "Authorization": f"Bearer {github_token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    # GraphQL query pour récupérer la discussion
-    query = """
-    query($owner: String!, $name: String!, $number: Int!) {
-      repository(owner: $owner, name: $name) {
-        discussion(number: $number) {
-          id
-          title
-          body
-          createdAt
-          closedAt
-          author {
-            login
-          }
-          comments(first: 100) {
-            nodes {
-              body
-              author {
-                login
-              }
-            }
-          }
-        }
-      }
-    }
-    """
-    
-    owner, name = repo_name.split('/')
-    variables = {
-        "owner": owner,
-        "name": name,
-        "number": discussion_number
-    }
-    
-    response = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": query, "variables": variables},
-        headers={"Authorization": f"Bearer {github_token}"}
-    )
-    
-    if response.status_code != 200:
-        raise Exception(f"GitHub API error: {response.status_code}")
-    
-    data = response.json()
-    discussion_data = data["data"]["repository"]["discussion"]
-    
-    # Créer un objet discussion-like pour compatibilité
-    class Discussion:
-        def __init__(self, data):
-            self.title = data["title"]
-            self.body = data["body"]
-            self.user = type('User', (), {'login': data["author"]["login"]})()
-            self._comments = data["comments"]["nodes"]
-        
-        def comments(self):
-            class Comment:
-                def __init__(self, data):
-                    self.body = data["body"]
-                    self.user = type('User', (), {'login': data["author"]["login"]})()
-            
-            return [Comment(c) for c in self._comments]
-    
-    discussion = Discussion(discussion_data)
-    
-    # Extraire le numéro d'issue
-    issue_number = extract_issue_number_from_discussion(discussion)
-    
-    if not issue_number:
-        print("⚠️  Warning: No related issue found in discussion")
-        issue_number = "N/A"
-    
-    # Générer le numéro ADR
-    adr_number = get_next_adr_number()
-    
-    # Parser le contenu
-    content = parse_discussion_content(discussion)
-    
-    # Nettoyer le titre (enlever le préfixe "ADR Discussion:")
-    title = re.sub(r'^ADR Discussion:\s*', '', discussion.title, flags=re.IGNORECASE)
-    
-    # Calculer le nav_order (dernier + 1)
-    existing_orders = []
-    for adr_file in ADR_DIR.glob("*.md"):
-        with adr_file.open() as f:
-            front = f.read().split('---', 2)
-            if len(front) >= 2:
-                fm = yaml.safe_load(front[1])
-                if 'nav_order' in fm:
-                    existing_orders.append(fm['nav_order'])
-    
-    nav_order = max(existing_orders, default=0) + 1
-    
-    # Générer le document
-    adr_content = ADR_TEMPLATE.format(
-        adr_number=adr_number,
-        title=title,
-        nav_order=nav_order,
-        status="Accepted",
-        date=datetime.now().strftime("%Y-%m-%d"),
+def clean_title(title):
+    """Titre de l'ADR : titre de la discussion sans le préfixe "ADR Discussion:" """
+    return re.sub(r'^ADR Discussion:\s*', '', title, flags=re.IGNORECASE)
+
+def render_adr(discussion, content, entry, discussion_number, issue_number, date):
+    """Document ADR pour une entrée du registre (numéro, titre, nav_order, statut)"""
+    return ADR_TEMPLATE.format(
+        adr_number=entry['number'],
+        title=entry['title'],
+        nav_order=entry['nav_order'],
+        status=entry['status'],
+        date=date,
         requirements=str(content['requirements']) if content['requirements'] else "[]",
         issues=f"[{issue_number}]" if issue_number != "N/A" else "[]",
         sil_impact=content['sil_impact'],
@@ -396,13 +338,45 @@ def generate_adr_document(discussion_number, github_token, repo_name):
         additional_references="",
         author=discussion.user.login
     )
+
+def generate_adr_document(discussion_number, github_token, repo_name, graphql_url=GRAPHQL_URL):
+    """Generate ADR document from discussion"""
+    
+    # Récupérer la discussion via GraphQL (PyGithub ne gère pas les
+    # discussions) : une connexion réutilisée, toutes les pages suivies,
+    # fermée même si la récupération ou le parsing échoue
+    with GraphQLSession(github_token, graphql_url) as session:
+        data, pages = fetch_discussion(session, repo_name, discussion_number)
+        discussion = Discussion(data, pages)
+        
+        # Extraire le numéro d'issue
+        issue_number = extract_issue_number_from_discussion(discussion)
+        
+        if not issue_number:
+            print("⚠️  Warning: No related issue found in discussion")
+            issue_number = "N/A"
+        
+        # Parser le contenu (les pages suivantes sont demandées ici)
+        content = parse_discussion_content(discussion)
     
-    # Écrire le fichier
-    adr_filename = f"adr-{adr_number:04d}.md"
-    adr_path = ADR_DIR / adr_filename
+    title = clean_title(discussion.title)
     
-    ADR_DIR.mkdir(parents=True, exist_ok=True)
-    adr_path.write_text(adr_content, encoding='utf-8')
+    # Numéro et nav_order réservés dans le registre, sous verrou jusqu'à
+    # l'écriture du fichier : pas de doublon entre générations concurrentes
+    with AdrRegistry.locked(ADR_DIR) as registry:
+        entry = registry.allocate(title, "Accepted", discussion_number)
+        adr_number = entry['number']
+        
+        # Générer le document
+        adr_content = render_adr(
+            discussion, content, entry, discussion_number, issue_number,
+            datetime.now().strftime("%Y-%m-%d")
+        )
+        
+        # Écrire le fichier, puis enregistrer la réservation
+        adr_path = ADR_DIR / entry['path']
+        adr_path.write_text(adr_content, encoding='utf-8')
+        registry.save()
     
     print(f"✅ ADR-{adr_number:04d} generated: {adr_path}")
     
@@ -413,20 +387,121 @@ def generate_adr_document(discussion_number, github_token, repo_name):
     
     return adr_path
 
+def read_dumps(paths):
+    """Dumps de discussions : fichier JSON (un dump ou une liste) ou JSONL (un dump par ligne)"""
+    for path in paths:
+        path = Path(path)
+        with path.open(encoding='utf-8') as f:
+            if path.suffix == ".jsonl":
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                data = json.load(f)
+                yield from (data if isinstance(data, list) else [data])
+
+def _staged_path(entry):
+    """Fichier temporaire d'un ADR généré hors ligne, renommé une fois le lot réussi"""
+    return ADR_DIR / f".{entry['path']}.tmp"
+
+def _generate_from_dump(job):
+    """Worker : une discussion du dump → fichier ADR temporaire (numéro déjà alloué)"""
+    dump, entry = job
+    data, pages = load_dump(dump)
+    discussion = Discussion(data, pages)
+    
+    issue_number = extract_issue_number_from_discussion(discussion) or "N/A"
+    content = parse_discussion_content(discussion, verbose=False)
+    
+    # Date de la discussion plutôt que du jour : régénérer donne le même document
+    date = (data.get("closedAt") or data.get("createdAt") or "")[:10]
+    adr_content = render_adr(
+        discussion, content, entry, data["number"], issue_number,
+        date or datetime.now().strftime("%Y-%m-%d")
+    )
+    
+    _staged_path(entry).write_text(adr_content, encoding='utf-8')
+
+def generate_from_dumps(paths, workers=None):
+    """
+    Generate ADR documents offline from discussion dumps
+    
+    Les numéros sont alloués sous verrou du registre, dans l'ordre des
+    numéros de discussion ; une discussion déjà enregistrée garde son
+    numéro et son nav_order. Le parsing et l'écriture sont répartis sur
+    un pool de processus, dans des fichiers temporaires : rien n'est
+    publié (ni fichier ADR, ni registre) si un seul document échoue.
+    """
+    dumps = {}
+    for dump in read_dumps(paths):
+        data, _ = load_dump(dump)
+        if data.get("number") is None:
+            raise ValueError(f"Discussion '{data['title']}' has no number in dump")
+        # Plusieurs dumps d'une même discussion : le dernier l'emporte
+        dumps[data["number"]] = (dump, clean_title(data["title"]))
+    
+    workers = workers or os.cpu_count() or 1
+    
+    with AdrRegistry.locked(ADR_DIR) as registry:
+        jobs = [
+            (dump, registry.assign(number, title, "Accepted"))
+            for number, (dump, title) in sorted(dumps.items())
+        ]
+        
+        try:
+            if workers == 1 or len(jobs) <= 1:
+                for job in jobs:
+                    _generate_from_dump(job)
+            else:
+                chunksize = max(1, len(jobs) // (workers * 4))
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    list(pool.map(_generate_from_dump, jobs, chunksize=chunksize))
+        except BaseException:
+            # Aucun fichier laissé pour un numéro non enregistré
+            for _, entry in jobs:
+                _staged_path(entry).unlink(missing_ok=True)
+            raise
+        
+        # Registre d'abord : un renommage interrompu est réparé en relançant
+        # le lot, les discussions gardant leur numéro
+        registry.save()
+        adr_paths = []
+        for _, entry in jobs:
+            adr_path = ADR_DIR / entry['path']
+            os.replace(_staged_path(entry), adr_path)
+            adr_paths.append(adr_path)
+    
+    for (_, entry), adr_path in zip(jobs, adr_paths):
+        print(f"✅ ADR-{entry['number']:04d} generated: {adr_path}")
+    print(f"📚 {len(adr_paths)} ADR(s) generated from {len(paths)} dump file(s)")
+    
+    return adr_paths
+
 def main():
     parser = argparse.ArgumentParser(description="Generate ADR from GitHub Discussion")
-    parser.add_argument("--discussion-number", type=int, required=True)
-    parser.add_argument("--github-token", required=True)
-    parser.add_argument("--repo", required=True, help="Repository in format owner/repo")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--discussion-number", type=int)
+    source.add_argument("--from-dump", nargs="+", metavar="FILE",
+                        help="Generate offline from discussion dumps (.json or .jsonl, GraphQL response shape)")
+    parser.add_argument("--github-token")
+    parser.add_argument("--repo", help="Repository in format owner/repo")
+    parser.add_argument("--graphql-url", default=GRAPHQL_URL, help="GraphQL endpoint (local stand-in for tests)")
+    parser.add_argument("--workers", type=int, help="Worker processes for --from-dump (default: CPU count)")
     
     args = parser.parse_args()
+    if args.discussion_number is not None and not (args.github_token and args.repo):
+        parser.error("--github-token and --repo are required with --discussion-number")
     
     try:
-        generate_adr_document(
-            args.discussion_number,
-            args.github_token,
-            args.repo
-        )
+        if args.from_dump:
+            generate_from_dumps(args.from_dump, args.workers)
+        else:
+            generate_adr_document(
+                args.discussion_number,
+                args.github_token,
+                args.repo,
+                args.graphql_url
+            )
     except Exception as e:
         print(f"❌ Error generating ADR: {e}")
         import traceback
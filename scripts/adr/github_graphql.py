@@ -0,0 +1,277 @@
+"""
+Récupération des discussions GitHub via l'API GraphQL.
+
+Toutes les pages de commentaires (et de réponses) sont suivies par
+curseur, sur une seule connexion HTTP persistante, et rendues au fil de
+l'eau : le parsing peut commencer dès la première page. load_dump lit
+la même réponse depuis un dump local, sans réseau.
+"""
+import http.client
+import json
+import time
+from urllib.parse import urlsplit
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+PAGE_SIZE = 100
+MAX_RETRIES = 3
+RETRY_STATUSES = {502, 503, 504}
+
+_COMMENT_FIELDS = """
+fragment CommentFields on DiscussionComment {
+  id
+  body
+  author { login }
+  replies(first: $first) {
+    pageInfo { hasNextPage endCursor }
+    nodes { id body author { login } }
+  }
+}
+"""
+
+DISCUSSION_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $first: Int!) {
+  repository(owner: $owner, name: $name) {
+    discussion(number: $number) {
+      id
+      number
+      title
+      body
+      createdAt
+      closedAt
+      author { login }
+      comments(first: $first) {
+        pageInfo { hasNextPage endCursor }
+        nodes { ...CommentFields }
+      }
+    }
+  }
+}
+""" + _COMMENT_FIELDS
+
+COMMENTS_QUERY = """
+query($id: ID!, $first: Int!, $after: String) {
+  node(id: $id) {
+    ... on Discussion {
+      comments(first: $first, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        nodes { ...CommentFields }
+      }
+    }
+  }
+}
+""" + _COMMENT_FIELDS
+
+REPLIES_QUERY = """
+query($id: ID!, $first: Int!, $after: String) {
+  node(id: $id) {
+    ... on DiscussionComment {
+      replies(first: $first, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        nodes { id body author { login } }
+      }
+    }
+  }
+}
+"""
+
+
+class GraphQLError(Exception):
+    """Erreur HTTP ou erreur renvoyée par l'API GraphQL."""
+    pass
+
+
+class GraphQLSession:
+    """
+    Client GraphQL minimal sur une connexion HTTP(S) keep-alive réutilisée
+    pour toutes les requêtes ; reconnexion et nouvel essai si le serveur
+    l'a fermée ou répond 502/503/504.
+    """
+
+    def __init__(self, token, url=GRAPHQL_URL, timeout=30):
+        parts = urlsplit(url)
+        self.host = parts.netloc
+        self.path = parts.path or "/"
+        self.https = parts.scheme == "https"
+        self.timeout = timeout
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+            "User-Agent": "nodal-workspaces-adr",
+        }
+        self.conn = None
+        self.requests = 0
+
+    def _connection(self):
+        if self.conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.conn = cls(self.host, timeout=self.timeout)
+        return self.conn
+
+    def execute(self, query, variables):
+        body = json.dumps({"query": query, "variables": variables}).encode("utf-8")
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                conn = self._connection()
+                conn.request("POST", self.path, body, self.headers)
+                response = conn.getresponse()
+                payload = response.read()
+            except (http.client.HTTPException, OSError):
+                # Connexion keep-alive fermée côté serveur, timeout...
+                self.close()
+                if attempt == MAX_RETRIES:
+                    raise
+                continue
+
+            self.requests += 1
+            if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                time.sleep(0.5 * 2 ** attempt)
+                continue
+            if response.status != 200:
+                raise GraphQLError(f"GitHub API error: {response.status}")
+
+            data = json.loads(payload)
+            if data.get("errors"):
+                raise GraphQLError("; ".join(e.get("message", "?") for e in data["errors"]))
+            return data["data"]
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _login(node):
+    # Compte supprimé → author null
+    return (node.get("author") or {}).get("login") or "ghost"
+
+
+class Comment:
+    """
+    Commentaire (ou réponse) de discussion, créé une seule fois par nœud
+    GraphQL. start / end : position du corps dans le texte assemblé de la
+    discussion (renseignés par l'assemblage, None avant).
+    """
+
+    __slots__ = ("id", "author", "body", "reply_to", "start", "end")
+
+    def __init__(self, id, author, body, reply_to=None):
+        self.id = id
+        self.author = author
+        self.body = body
+        self.reply_to = reply_to
+        self.start = None
+        self.end = None
+
+    def __repr__(self):
+        return f"Comment({self.id!r}, author={self.author!r})"
+
+
+def _comment(node, reply_to=None):
+    return Comment(node["id"], _login(node), node.get("body") or "", reply_to)
+
+
+def _iter_replies(session, comment, page_size):
+    """Réponses d'un commentaire : la première page est déjà dans comment."""
+    replies = comment["replies"]
+    while True:
+        for node in replies["nodes"]:
+            yield _comment(node, reply_to=comment["id"])
+
+        info = replies["pageInfo"]
+        if not info["hasNextPage"]:
+            return
+        data = session.execute(REPLIES_QUERY, {
+            "id": comment["id"], "first": page_size, "after": info["endCursor"]
+        })
+        replies = data["node"]["replies"]
+
+
+def _flatten(session, nodes, page_size):
+    """Une page de commentaires, chaque commentaire suivi de ses réponses."""
+    page = []
+    for node in nodes:
+        page.append(_comment(node))
+        page.extend(_iter_replies(session, node, page_size))
+    return page
+
+
+def fetch_discussion(session, repo_name, number, page_size=PAGE_SIZE):
+    """
+    Récupère une discussion et ses commentaires.
+
+    :return: (discussion, pages) — discussion contient id, title, body,
+             createdAt, closedAt et author ; pages est un générateur de
+             listes de Comment, la page suivante n'étant demandée qu'une
+             fois la précédente consommée
+    :raises GraphQLError: erreur API ou discussion introuvable
+    """
+    owner, name = repo_name.split("/")
+    data = session.execute(DISCUSSION_QUERY, {
+        "owner": owner, "name": name, "number": number, "first": page_size
+    })
+
+    discussion = (data.get("repository") or {}).get("discussion")
+    if discussion is None:
+        raise GraphQLError(f"Discussion #{number} not found in {repo_name}")
+
+    comments = discussion.pop("comments")
+    discussion["author"] = _login(discussion)
+
+    def pages():
+        connection = comments
+        while True:
+            yield _flatten(session, connection["nodes"], page_size)
+
+            info = connection["pageInfo"]
+            if not info["hasNextPage"]:
+                return
+            data = session.execute(COMMENTS_QUERY, {
+                "id": discussion["id"], "first": page_size, "after": info["endCursor"]
+            })
+            connection = data["node"]["comments"]
+
+    return discussion, pages()
+
+
+def _nodes(connection):
+    """Nœuds d'une connexion de dump : {"nodes": [...]} ou directement la liste."""
+    if connection is None:
+        return []
+    return connection if isinstance(connection, list) else connection.get("nodes") or []
+
+
+def load_dump(obj):
+    """
+    Discussion lue depuis un dump hors ligne, de même forme que la réponse
+    GraphQL : réponse complète ({"data": {"repository": {"discussion": ...}}})
+    ou directement l'objet discussion. Le dump doit contenir toutes les
+    pages de commentaires et de réponses ; pageInfo est ignoré.
+
+    :return: (discussion, pages) comme fetch_discussion
+    :raises GraphQLError: aucune discussion dans le dump
+    """
+    for key in ("data", "repository", "discussion"):
+        if isinstance(obj, dict) and key in obj:
+            obj = obj[key]
+    if not isinstance(obj, dict) or "title" not in obj:
+        raise GraphQLError("No discussion found in dump")
+
+    discussion = dict(obj)
+    comments = discussion.pop("comments", None)
+    discussion["author"] = _login(discussion)
+
+    def pages():
+        page = []
+        for node in _nodes(comments):
+            page.append(_comment(node))
+            page.extend(_comment(reply, reply_to=node["id"]) for reply in _nodes(node.get("replies")))
+        yield page
+
+    return discussion, pages()
@@ -0,0 +1,128 @@
+"""
+Index des sections markdown d'une discussion.
+
+Le texte est parcouru une seule fois pour repérer titres (## Nom),
+titres entre backticks (`## Nom`) et libellés gras (**Nom**), avec la
+position du contenu qui suit chacun. Chaque recherche de section se fait
+ensuite sur cet index, avec les mêmes règles que les trois motifs
+historiques d'extract_section :
+
+    ##\\s+Nom\\s*\\n(.*?)(?=\\n##|\\Z)
+    `##\\s+Nom`\\s*\\n(.*?)(?=\\n`##|---|\\Z)
+    \\*\\*Nom\\*\\*:?\\s*\\n(.*?)(?=\\n\\*\\*|---|\\Z)
+
+Pour chaque forme, seule la première occurrence du nom compte ; si son
+contenu est vide ou vaut "Not documented", on passe à la forme suivante.
+"""
+import re
+
+NOT_DOCUMENTED = "Not documented"
+
+# Libellés capturés en lookahead : seul le préfixe est consommé, si bien
+# qu'un "##" ou "**" situé dans un libellé est lui aussi indexé
+_LABEL_PATTERNS = (
+    re.compile(r"##\s+(?=([^\n]*)\n)"),          # ## Nom
+    re.compile(r"`##\s+(?=([^`\n]*)`)"),          # `## Nom`
+    re.compile(r"\*(?=\*([^*\n]*)\*\*)"),         # **Nom**
+)
+
+# Terminateurs du contenu, par forme
+_TERMINATORS = (
+    ("\n##",),
+    ("\n`##", "---"),
+    ("\n**", "---"),
+)
+
+
+def _content_start(text, pos):
+    """
+    Après un libellé : la suite d'espaces doit contenir un saut de ligne ;
+    le contenu commence après le dernier (comme \\s*\\n glouton).
+    """
+    end = pos
+    n = len(text)
+    while end < n and text[end].isspace():
+        end += 1
+
+    newline = text.rfind("\n", pos, end)
+    return newline + 1 if newline != -1 else None
+
+
+class SectionIndex:
+    def __init__(self, text):
+        self.text = text
+        # Par forme : libellé brut → positions de fin de match, dans l'ordre
+        self.labels = tuple({} for _ in _LABEL_PATTERNS)
+        self._cache = {}
+
+        for pattern, labels in zip(_LABEL_PATTERNS, self.labels):
+            for match in pattern.finditer(text):
+                labels.setdefault(match.group(1), []).append(match.end())
+
+    def _after_label(self, kind, label, pos):
+        """Position qui suit le libellé et son délimiteur fermant."""
+        if kind == 0:
+            return pos + len(label.rstrip())
+        if kind == 1:
+            return pos + len(label) + 1
+        after = pos + 1 + len(label) + 2
+        if self.text.startswith(":", after):
+            after += 1
+        return after
+
+    def _find(self, kind, name):
+        """(début, fin) du contenu brut (non strippé) de la première occurrence, ou None."""
+        matcher = re.compile(name, re.IGNORECASE).fullmatch
+
+        candidates = []
+        for label, positions in self.labels[kind].items():
+            if matcher(label.rstrip() if kind == 0 else label):
+                candidates.extend((pos, label) for pos in positions)
+        candidates.sort()
+
+        text = self.text
+        for pos, label in candidates:
+            content_start = _content_start(text, self._after_label(kind, label, pos))
+            if content_start is None:
+                continue
+
+            end = len(text)
+            for terminator in _TERMINATORS[kind]:
+                # Un terminateur qui commence avant end compte, même s'il le chevauche
+                found = text.find(terminator, content_start, end + len(terminator) - 1)
+                if found != -1 and found < end:
+                    end = found
+            return content_start, end
+        return None
+
+    def span(self, section_name):
+        """
+        Position (début, fin) du contenu strippé de la section dans le
+        texte, ou None si elle n'est pas documentée (mêmes règles qu'extract).
+        """
+        if section_name in self._cache:
+            return self._cache[section_name]
+
+        result = None
+        text = self.text
+        for kind in range(len(_LABEL_PATTERNS)):
+            found = self._find(kind, section_name)
+            if found is None:
+                continue
+
+            start, end = found
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if start < end and text[start:end] != NOT_DOCUMENTED:
+                result = (start, end)
+                break
+
+        self._cache[section_name] = result
+        return result
+
+    def extract(self, section_name):
+        """Contenu de la section, ou "Not documented" (mêmes règles qu'avant)."""
+        span = self.span(section_name)
+        return self.text[span[0]:span[1]] if span else NOT_DOCUMENTED
@@ -0,0 +1,273 @@
+"""
+API en mémoire du bot ADR.
+
+Aucune E/S ni sys.exit : un événement (état + commentaires) produit un
+BotResult contenant tous les messages et le nouvel état. main.py n'est
+qu'une surcouche CLI qui lit le payload, sauvegarde et imprime.
+"""
+import copy
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from model import AdrStatus
+from fsm import apply_fsm
+from state_io import CommentDigest, consume_checkpoint, RESUMED, STALE
+from commands import apply_event
+from render import format_section_content
+from errors import BotError, success_payload
+from utils import is_maintainer
+from parser import parse_adr_commands, AdrParseError
+from tracing import NULL_TRACER
+
+
+READ_ONLY_COMMANDS = {"show", "status"}
+
+# Champs lus sur chaque commentaire (id est facultatif)
+COMMENT_FIELDS = ("author", "author_role", "created_at", "body")
+
+
+@dataclass
+class BotResult:
+    """
+    Résultat d'un événement : messages JSON émis, état à persister et
+    événements de journal qui ont produit cet état. stale : payload en
+    retard sur le checkpoint, ignoré (ni message ni événement).
+    """
+
+    state: Dict
+    messages: List[Dict] = field(default_factory=list)
+    events: List[Dict] = field(default_factory=list)
+    ok: bool = True
+    stale: bool = False
+
+    @property
+    def exit_code(self) -> int:
+        return 0 if self.ok else 1
+
+
+def emit(state, events, event, comment=None):
+    """Applique event à state puis l'ajoute à events (jamais l'inverse)."""
+    if comment is not None:
+        event["comment_id"] = comment.get("id")
+        event["at"] = comment.get("created_at")
+    apply_event(state, event)
+    events.append(event)
+
+
+def process_comments(state, comments, messages, events, tracer=NULL_TRACER, first_index=0):
+    """
+    Applique les commandes /adr de comments à state, dans l'ordre.
+
+    Chaque commentaire est appliqué entièrement avant le suivant (y compris
+    approve / supersede), si bien que traiter A puis B donne le même état
+    que traiter A + B d'un coup : c'est ce qui rend le checkpoint exact.
+    Toute mutation passe par un événement ajouté à events. Chaque
+    commentaire est un span de tracer (parse / fsm à l'intérieur).
+
+    :raises BotError: commande invalide ou refusée, section inconnue
+    :return: (dernière commande terminale, son contexte)
+    """
+    current_status = AdrStatus(state["state"]["status"])
+
+    last_terminal = None
+    last_ctx = {}
+
+    for index, c in enumerate(comments, first_index):
+        # Préfiltre : la plupart des commentaires ne contiennent aucune commande
+        if "/adr" not in c["body"]:
+            continue
+
+        with tracer.span("comment", cat="comment", index=index, id=c.get("id")):
+            try:
+                with tracer.span("parse"):
+                    commands = parse_adr_commands(c["body"])
+            except AdrParseError as e:
+                raise BotError(str(e))
+
+            if not commands:
+                continue
+
+            for parsed in commands:
+                cmd = parsed["type"]
+                section = parsed.get("section")
+                if section is not None and section not in state["sections"]:
+                    raise BotError(
+                        f"Unknown section '{section}'. "
+                        f"Expected one of: {', '.join(sorted(state['sections']))}"
+                    )
+
+                # ─────────────────────────────────────────────
+                # Commandes READ-ONLY → bypass FSM
+                # ─────────────────────────────────────────────
+                if cmd in READ_ONLY_COMMANDS:
+                    if cmd == "show":
+                        last_terminal = "show"
+                        last_ctx = {"section": section}
+                    continue
+
+                # ─────────────────────────────────────────────
+                # Commandes mutantes → FSM
+                # ─────────────────────────────────────────────
+                try:
+                    with tracer.span("fsm"):
+                        next_status = apply_fsm(current_status, cmd)
+                except ValueError as e:
+                    raise BotError(str(e))
+
+                content = parsed.get("content")
+
+                if cmd == "fill":
+                    emit(state, events, {
+                        "type": "fill", "section": section, "content": content
+                    }, c)
+                    messages.append(
+                        success_payload(f"Section '{section}' updated successfully.")
+                    )
+
+                elif cmd == "append":
+                    emit(state, events, {
+                        "type": "append", "section": section, "content": content
+                    }, c)
+                    messages.append(
+                        success_payload(f"Section '{section}' appended successfully.")
+                    )
+
+                elif cmd == "approve":
+                    if current_status != AdrStatus.PROPOSED:
+                        continue
+                    if not is_maintainer(c["author_role"]):
+                        raise BotError("Permission denied")
+
+                    emit(state, events, {
+                        "type": "approve",
+                        "author": c["author"],
+                        "time": c["created_at"]
+                    }, c)
+                    last_terminal = "approve"
+                    last_ctx = {}
+
+                elif cmd == "supersede":
+                    if not is_maintainer(c["author_role"]):
+                        raise BotError("Permission denied")
+
+                    emit(state, events, {
+                        "type": "supersede",
+                        "target": parsed.get("target"),
+                        "author": c["author"],
+                        "time": c["created_at"]
+                    }, c)
+                    last_terminal = "supersede"
+                    last_ctx = {}
+
+                if state["state"]["status"] != next_status.value:
+                    emit(state, events, {
+                        "type": "transition",
+                        "from": state["state"]["status"],
+                        "to": next_status.value
+                    }, c)
+                current_status = next_status
+
+    return last_terminal, last_ctx
+
+
+def _checked(comments: Iterator[Dict]) -> Iterator[Dict]:
+    """Vérifie la forme de chaque commentaire : BotError plutôt qu'une KeyError en aval."""
+    try:
+        for index, c in enumerate(comments):
+            if not isinstance(c, dict):
+                raise BotError(f"Invalid comment #{index}: expected an object")
+            missing = [name for name in COMMENT_FIELDS if name not in c]
+            if missing:
+                raise BotError(f"Invalid comment #{index}: missing {', '.join(missing)}")
+            if not isinstance(c["body"], str):
+                raise BotError(f"Invalid comment #{index}: body must be a string")
+            yield c
+    finally:
+        if hasattr(comments, "close"):
+            comments.close()
+
+
+def _digested(comments: Iterator[Dict], digest: CommentDigest) -> Iterator[Dict]:
+    for c in comments:
+        digest.update(c)
+        yield c
+
+
+def handle_event(comments: Union[List[Dict], Callable[[], Iterable[Dict]]], meta: Dict,
+                 state: Optional[Dict] = None, tracer=NULL_TRACER) -> BotResult:
+    """
+    Traite un événement de discussion sans effet de bord.
+
+    Les commentaires sont parcourus une seule fois, en flux : le préfixe
+    couvert par le checkpoint est seulement haché, la suite est traitée
+    au fil de l'eau. Seule une reconstruction complète relit le flux.
+    Des commentaires qui s'arrêtent avant le checkpoint (payload en
+    retard) ne changent rien : BotResult(stale=True), sans événement.
+
+    :param comments: commentaires de la discussion, dans l'ordre ; liste
+                     ou fonction sans argument qui ouvre un nouvel itérateur
+                     (payload_io.iter_comments, par exemple)
+    :param meta: métadonnées de la discussion (état initial)
+    :param state: état sauvegardé, ou None pour tout rejouer
+    :param tracer: tracing.Tracer pour mesurer phases et commentaires
+    :return: BotResult ; state n'est jamais modifié en place. Une entrée
+             invalide (commentaire mal formé, commande refusée) donne
+             ok=False et un message d'erreur, jamais une exception
+    """
+    open_comments = comments if callable(comments) else (lambda: iter(comments))
+
+    digest = CommentDigest()
+    stream = _checked(open_comments())
+    try:
+        with tracer.span("resume"):
+            resume = consume_checkpoint(state, stream, digest) if state is not None else None
+    except BotError as e:
+        stream.close()
+        return BotResult(state=state, messages=[e.payload()], ok=False)
+
+    if resume == STALE:
+        stream.close()
+        return BotResult(state=state, stale=True)
+
+    messages = []
+    events = []
+
+    # Pas de checkpoint exploitable → reconstruction complète
+    if resume != RESUMED:
+        new_state = {}
+        emit(new_state, events, {"type": "reset", "meta": meta})
+        stream.close()
+        digest = CommentDigest()
+        stream = _checked(open_comments())
+    else:
+        with tracer.span("copy_state"):
+            new_state = copy.deepcopy(state)
+
+    try:
+        last_terminal, last_ctx = process_comments(
+            new_state, _digested(stream, digest), messages, events, tracer, digest.count
+        )
+    except BotError as e:
+        messages.append(e.payload())
+        return BotResult(state=state, messages=messages, ok=False)
+
+    emit(new_state, events, {
+        "type": "checkpoint",
+        "checkpoint": digest.checkpoint(state["checkpoint"]["count"] if resume == RESUMED else 0)
+    })
+
+    # ─────────────────────────────────────────────
+    # Actions terminales
+    # ─────────────────────────────────────────────
+    if last_terminal == "show":
+        with tracer.span("render"):
+            content = format_section_content(new_state, last_ctx.get("section"))
+        messages.append(success_payload("ADR content", content=content))
+
+    elif last_terminal == "approve":
+        messages.append(success_payload("ADR approved"))
+
+    elif last_terminal == "supersede":
+        messages.append(success_payload("ADR superseded"))
+
+    return BotResult(state=new_state, messages=messages, events=events)
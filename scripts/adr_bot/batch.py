@@ -0,0 +1,189 @@
+"""
+Traitement en lot de discussions ADR.
+
+Chaque payload (même format que main.py) est traité via journal.run_event
+avec son propre fichier d'état ; les payloads sont répartis sur un pool
+de processus et un rapport JSON agrégé est produit.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePath
+
+from journal import run_event
+from errors import error_payload
+
+
+def iter_payloads(source: Path):
+    """
+    Itère sur (origine, payload) depuis un dossier de *.json ou un fichier
+    JSONL ; un payload illisible donne (origine, ValueError).
+    """
+    if source.is_dir():
+        for path in sorted(source.glob("*.json")):
+            with open(path) as f:
+                try:
+                    yield str(path), json.load(f)
+                except ValueError as e:
+                    yield str(path), e
+        return
+
+    with open(source) as f:
+        for line_num, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield f"{source}:{line_num}", json.loads(line)
+                except ValueError as e:
+                    yield f"{source}:{line_num}", e
+
+
+def state_path_for(payload, state_dir: Path) -> str:
+    """
+    Fichier d'état du payload, toujours sous state_dir : state_path
+    explicite (chemin relatif, sans ".."), sinon un fichier par discussion.
+
+    :raises ValueError: state_path absolu ou qui sort de state_dir
+    """
+    relative = payload.get("state_path")
+    if relative:
+        path = PurePath(relative)
+        if path.is_absolute() or ".." in path.parts:
+            raise ValueError(f"Invalid state_path '{relative}': must be relative to the state directory")
+        return str(state_dir / path)
+    number = payload["meta"]["discussion_number"]
+    return str(state_dir / f"adr_state_{number}.json")
+
+
+def failure(source, message, payload=None, state_path=None, seconds=0.0):
+    """Entrée de rapport d'un payload qui n'a pas pu être traité."""
+    meta = payload.get("meta") if isinstance(payload, dict) else None
+    return {
+        "source": source,
+        "discussion_number": meta.get("discussion_number") if isinstance(meta, dict) else None,
+        "state_path": state_path,
+        "ok": False,
+        "status": None,
+        "comments": None,
+        "messages": [error_payload(message)],
+        "seconds": round(seconds, 6),
+    }
+
+
+def run_one(source, payload, state_path, full_replay):
+    """Traite un payload ; une exception est consignée dans le rapport, sans arrêter le lot."""
+    started = time.perf_counter()
+
+    try:
+        # state_path peut désigner un sous-dossier de state_dir
+        Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+        result = run_event(state_path, payload["comments"], payload["meta"], full_replay)
+    except Exception as e:
+        return failure(
+            source, f"{type(e).__name__}: {e}", payload, state_path,
+            time.perf_counter() - started
+        )
+
+    return {
+        "source": source,
+        "discussion_number": payload["meta"].get("discussion_number"),
+        "state_path": state_path,
+        "ok": result.ok,
+        "status": result.state["state"]["status"] if result.state else None,
+        "comments": len(payload["comments"]),
+        "messages": result.messages,
+        "seconds": round(time.perf_counter() - started, 6),
+    }
+
+
+def run_group(jobs, full_replay):
+    """Traite dans l'ordre les payloads qui partagent un même fichier d'état."""
+    return [
+        run_one(source, payload, state_path, full_replay)
+        for source, payload, state_path in jobs
+    ]
+
+
+def run_batch(source: Path, state_dir: Path, jobs: int = 1, full_replay: bool = False):
+    """
+    Traite tous les payloads de source et retourne le rapport agrégé.
+
+    Les payloads d'un même fichier d'état restent séquentiels (dans leur
+    ordre d'apparition) ; les groupes indépendants s'exécutent en parallèle.
+    """
+    started = time.perf_counter()
+
+    groups = {}
+    rejected = []
+    for origin, payload in iter_payloads(source):
+        if isinstance(payload, ValueError):
+            rejected.append(failure(origin, f"Invalid JSON payload: {payload}"))
+            continue
+        try:
+            state_path = state_path_for(payload, state_dir)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            rejected.append(failure(origin, f"Invalid payload: {type(e).__name__}: {e}", payload))
+            continue
+        groups.setdefault(state_path, []).append((origin, payload, state_path))
+
+    state_dir.mkdir(parents=True, exist_ok=True)
+
+    if jobs > 1 and len(groups) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            outcomes = list(pool.map(
+                run_group, groups.values(), [full_replay] * len(groups)
+            ))
+    else:
+        outcomes = [run_group(group, full_replay) for group in groups.values()]
+
+    results = [r for group in outcomes for r in group] + rejected
+    failed = sum(1 for r in results if not r["ok"])
+
+    return {
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "jobs": jobs,
+        "seconds": round(time.perf_counter() - started, 6),
+        "results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Process many ADR discussion payloads in one run")
+    parser.add_argument("source", type=Path, help="Directory of *.json payloads or a JSONL file")
+    parser.add_argument(
+        "--state-dir",
+        type=Path,
+        default=Path("."),
+        help="Where state files go (a payload state_path is resolved under it)"
+    )
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes (0 = one per CPU)")
+    parser.add_argument("--report", type=Path, help="Write the JSON report here instead of stdout")
+    parser.add_argument(
+        "--full-replay",
+        action="store_true",
+        help="Ignore saved checkpoints and rebuild every state from its comments"
+    )
+    args = parser.parse_args()
+
+    report = run_batch(
+        args.source,
+        args.state_dir,
+        args.jobs or os.cpu_count() or 1,
+        args.full_replay
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.report:
+        args.report.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
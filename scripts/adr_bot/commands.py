@@ -1,6 +1,9 @@
-from constants import REQUIRED_SECTIONS, ADR_DIR
+import copy
+
+from constants import REQUIRED_SECTIONS, ADR_DIR, CHECKPOINT_PRINT_BYTES
 from model import AdrStatus
-from errors import bot_error
+from errors import BotError
+from state_io import create_empty_state
 
 
 def validate_required_sections(state):
@@ -9,7 +12,7 @@ def validate_required_sections(state):
         if not state["sections"][s]["content"].strip()
     ]
     if missing:
-        bot_error(
+        raise BotError(
             "Missing required ADR sections",
             missing=missing
         )
@@ -26,3 +29,56 @@ def apply_approve(state, author, time):
     state["state"]["status"] = AdrStatus.APPROVED.value
     state["state"]["approved_by"] = author
     state["state"]["approved_at"] = time
+
+
+def apply_event(state, event):
+    """
+    Applique un événement du journal à state (en place).
+
+    C'est le seul chemin de mutation : le traitement des commentaires et
+    le rejeu du journal passent tous deux par ici.
+    """
+    kind = event["type"]
+
+    if kind == "reset":
+        state.clear()
+        state.update(create_empty_state(event["meta"]))
+
+    elif kind == "base":
+        state.clear()
+        state.update(copy.deepcopy(event["state"]))
+
+    elif kind == "fill":
+        state["sections"][event["section"]]["content"] = event["content"].strip()
+
+    elif kind == "append":
+        cur = state["sections"][event["section"]]["content"]
+        content = event["content"].strip()
+        state["sections"][event["section"]]["content"] = (
+            cur + "\n\n" + content if cur else content
+        )
+
+    elif kind == "approve":
+        apply_approve(state, event["author"], event["time"])
+
+    elif kind == "supersede":
+        apply_supersede(state, event["target"], event["author"], event["time"])
+
+    elif kind == "transition":
+        state["state"]["status"] = event["to"]
+
+    elif kind == "checkpoint":
+        # L'événement ne porte que les empreintes des nouveaux commentaires
+        checkpoint = dict(event["checkpoint"])
+        start = checkpoint.pop("prints_from", 0) * 2 * CHECKPOINT_PRINT_BYTES
+        previous = state.get("checkpoint", {}).get("prints", "")
+        if "prints" in checkpoint and len(previous) >= start:
+            checkpoint["prints"] = previous[:start] + checkpoint["prints"]
+        else:
+            checkpoint.pop("prints", None)
+        state["checkpoint"] = checkpoint
+
+    else:
+        raise ValueError(f"Unknown journal event: {kind}")
+
+    return state
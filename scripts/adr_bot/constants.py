@@ -8,3 +8,24 @@ REQUIRED_SECTIONS = {
 
 ADR_TEMPLATE_FILE = "adr_template.md"
 STATE_FILE = "adr_state.json"
+
+# Empreinte courte de chaque commentaire gardée dans le checkpoint (octets)
+CHECKPOINT_PRINT_BYTES = 4
+
+# Le snapshot est réécrit tous les N événements, sinon le journal est seulement complété
+JOURNAL_COMPACT_EVERY = 50
+
+# Conflit de version à l'écriture : nombre de rejeux et attente initiale (secondes)
+STATE_WRITE_RETRIES = 5
+STATE_WRITE_BACKOFF = 0.05
+
+# Mode service : socket par défaut, nombre d'états gardés en mémoire, taille max d'une requête
+SERVICE_SOCKET = "adr_bot.sock"
+SERVICE_CACHE_SIZE = 128
+SERVICE_MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+# Rendus (show complet, templates injectés) gardés en mémoire, indexés par empreinte des sections
+RENDER_CACHE_SIZE = 256
+
+# Lecture en flux des payloads : taille des blocs lus (caractères)
+PAYLOAD_CHUNK_SIZE = 64 * 1024
@@ -1,21 +1,31 @@
-import json
-import sys
+class BotError(Exception):
+    """
+    Erreur de commande ADR.
 
+    Levée par le moteur, convertie en message JSON par l'API
+    au lieu d'interrompre le processus.
+    """
 
-def bot_error(message, **extra):
-    payload = {
+    def __init__(self, message, **extra):
+        super().__init__(message)
+        self.message = message
+        self.extra = extra
+
+    def payload(self):
+        return error_payload(self.message, **self.extra)
+
+
+def error_payload(message, **extra):
+    return {
         "status": "error",
         "message": message,
         **extra
     }
-    print(json.dumps(payload))
-    sys.exit(1)
 
 
-def bot_success(message, **extra):
-    payload = {
+def success_payload(message, **extra):
+    return {
         "status": "success",
         "message": message,
         **extra
     }
-    print(json.dumps(payload))
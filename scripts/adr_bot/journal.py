@@ -0,0 +1,317 @@
+"""
+Journal append-only des événements ADR.
+
+Chaque événement appliqué à un état (commande parsée, transition FSM,
+checkpoint) est ajouté en une ligne JSON à <état>.journal.jsonl. Le
+fichier d'état n'est plus qu'un snapshot, réécrit tous les
+JOURNAL_COMPACT_EVERY événements : il mémorise la position du journal
+qu'il couvre, et l'état courant = snapshot + rejeu de la fin du journal.
+Le journal n'est jamais tronqué, ce qui permet de reconstruire l'état
+à n'importe quel point de l'historique.
+
+Le numéro du dernier événement appliqué sert de version ("version" dans
+l'état) : persist n'ajoute des événements que si le journal est toujours
+à la version lue (compare-and-swap sous verrou), sinon run_event rejoue
+l'événement sur le nouvel état.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows : pas de verrou inter-processus
+    fcntl = None
+
+from constants import STATE_FILE, JOURNAL_COMPACT_EVERY, STATE_WRITE_RETRIES, STATE_WRITE_BACKOFF
+from commands import apply_event
+from state_io import load_state, save_state, is_behind
+from api import BotResult, handle_event
+from errors import error_payload
+from tracing import NULL_TRACER
+
+
+class StateConflict(Exception):
+    """Le journal a avancé depuis la lecture de l'état (écriture concurrente)."""
+    pass
+
+
+def journal_path(state_path):
+    root, _ = os.path.splitext(state_path)
+    return root + ".journal.jsonl"
+
+
+def state_stamp(state_path):
+    """Empreinte bon marché (stat) du snapshot et du journal d'un état."""
+    stamp = []
+    for path in (state_path, journal_path(state_path)):
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def read_events(path, offset=0):
+    """Itère sur les événements à partir de l'octet offset ; ignore une ligne finale tronquée."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+
+    with f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            yield json.loads(line)
+
+
+def last_seq(path):
+    """Numéro du dernier événement complet du journal, lu depuis la fin du fichier."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return 0
+
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        buf = b""
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            # Une ligne complète se termine par \n ; ignorer un éventuel reste tronqué
+            complete = buf[:buf.rfind(b"\n") + 1] if b"\n" in buf else b""
+            lines = complete.rstrip(b"\n").rsplit(b"\n", 1)
+            if complete and (len(lines) == 2 or pos == 0):
+                return json.loads(lines[-1])["seq"]
+    return 0
+
+
+def truncate_partial_line(f):
+    """Supprime une ligne finale incomplète (écriture interrompue) avant d'ajouter."""
+    end = f.seek(0, os.SEEK_END)
+    if end == 0:
+        return
+
+    pos = end
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        chunk = f.read(step)
+        newline = chunk.rfind(b"\n")
+        if newline != -1:
+            keep = pos + newline + 1
+            break
+    else:
+        keep = 0
+
+    if keep != end:
+        f.truncate(keep)
+    f.seek(0, os.SEEK_END)
+
+
+@contextlib.contextmanager
+def locked_journal(path):
+    """Ouvre le journal en ajout sous verrou exclusif, libéré à la fermeture."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield f
+
+
+def load_current_state(state_path):
+    """
+    Snapshot + rejeu des événements postérieurs.
+
+    :return: état courant, ou None si ni snapshot ni journal n'existent
+    """
+    try:
+        state = load_state(state_path)
+    except FileNotFoundError:
+        state = None
+
+    position = (state or {}).get("journal", {"seq": 0, "offset": 0})
+    version = position["seq"]
+    for event in read_events(journal_path(state_path), position["offset"]):
+        if state is None:
+            state = {}
+        apply_event(state, event)
+        if "journal" not in state:
+            state["journal"] = position
+        version = event["seq"]
+
+    if state is not None:
+        state["version"] = version
+    return state
+
+
+def persist(state_path, state, events, base=None, expected=None,
+            compact_every=JOURNAL_COMPACT_EVERY):
+    """
+    Ajoute events au journal et réécrit le snapshot si la compaction est due.
+
+    :param state: état obtenu après application de events ; sa "version"
+                  devient le numéro du dernier événement écrit
+    :param base: état de départ, écrit comme événement "base" si le journal
+                 n'existe pas encore et ne commence pas par un "reset"
+    :param expected: version attendue du journal, None pour écrire sans contrôle
+    :raises StateConflict: le journal n'est plus à la version attendue
+    :return: state_stamp des fichiers écrits, relevé sous le verrou
+    """
+    path = journal_path(state_path)
+
+    with locked_journal(path) as f:
+        seq = last_seq(path)
+        if expected is not None and seq != expected:
+            raise StateConflict(f"{path}: expected version {expected}, found {seq}")
+
+        if seq == 0 and base is not None and events and events[0]["type"] != "reset":
+            base_state = {k: v for k, v in base.items() if k not in ("journal", "version")}
+            events = [{"type": "base", "state": base_state}] + list(events)
+
+        lines = []
+        for event in events:
+            seq += 1
+            lines.append(json.dumps({"seq": seq, **event}, ensure_ascii=False) + "\n")
+
+        # Une seule écriture : les événements d'un run sont ajoutés ensemble
+        truncate_partial_line(f)
+        f.write("".join(lines).encode("utf-8"))
+        f.flush()
+        offset = f.tell()
+
+        state["version"] = seq
+        # Un run en lecture seule (show) n'avance que le checkpoint : jamais de snapshot
+        mutating = any(event["type"] != "checkpoint" for event in events)
+        position = state.get("journal")
+        if position is None or (mutating and seq - position["seq"] >= compact_every):
+            state["journal"] = {"seq": seq, "offset": offset}
+            save_state(state, state_path)
+
+        return state_stamp(state_path)
+
+
+def is_noop(result, state):
+    """Rien de nouveau : seul le checkpoint est émis, et il est inchangé."""
+    return (
+        state is not None
+        and all(event["type"] == "checkpoint" for event in result.events)
+        and result.state.get("checkpoint") == state.get("checkpoint")
+    )
+
+
+def run_event(state_path, comments, meta, full_replay=False, load=load_current_state,
+              retries=STATE_WRITE_RETRIES, tracer=NULL_TRACER, on_saved=None, on_conflict=None):
+    """
+    Charge l'état, traite l'événement et l'enregistre par compare-and-swap.
+    Un événement qui ne change rien (même commentaires) n'écrit rien.
+
+    Si un autre processus a écrit entre la lecture et l'écriture,
+    l'événement est retraité sur l'état rechargé (backoff exponentiel).
+    Un payload en retard sur l'état enregistré (checkpoint plus court,
+    de même préfixe) n'est jamais écrit : BotResult(stale=True). Un
+    perdant ne ramène donc pas l'état du gagnant en arrière, y compris
+    en reconstruction complète.
+
+    :param load: chargeur d'état (cache du mode service, par exemple)
+    :param on_saved: appelé avec (state_path, état écrit, state_stamp relevé
+                     sous le verrou) après chaque écriture
+    :param on_conflict: appelé avec state_path à chaque conflit, avant de
+                        recharger (pour invalider un cache, par exemple)
+    :param tracer: tracing.Tracer ; phases load_state, save_state et celles de handle_event
+    :return: BotResult ; ok=False si les conflits persistent
+    """
+    for attempt in range(retries + 1):
+        with tracer.span("load_state"):
+            stored = load(state_path)
+            expected = stored["version"] if stored is not None else 0
+            # Reconstruction complète : l'état enregistré ne sert qu'au contrôle de retard
+            state = None if full_replay else stored
+
+        result = handle_event(comments, meta, state, tracer)
+        if result.ok and stored is not None and is_behind(
+            result.state.get("checkpoint"), stored.get("checkpoint")
+        ):
+            return BotResult(state=stored, stale=True)
+        if not result.ok or result.stale or is_noop(result, state):
+            return result
+
+        try:
+            with tracer.span("save_state"):
+                stamp = persist(state_path, result.state, result.events, base=state, expected=expected)
+        except StateConflict as e:
+            conflict = e
+            if on_conflict is not None:
+                on_conflict(state_path)
+            time.sleep(STATE_WRITE_BACKOFF * (2 ** attempt))
+            continue
+
+        if on_saved is not None:
+            on_saved(state_path, result.state, stamp)
+        return result
+
+    return BotResult(
+        state=state,
+        messages=[error_payload(f"Concurrent state update: {conflict}")],
+        ok=False
+    )
+
+
+def state_at(state_path, seq=None, until=None):
+    """
+    Reconstruit l'état tel qu'il était après l'événement seq, ou juste
+    avant le premier événement horodaté après until (ISO 8601).
+    """
+    state = None
+    for event in read_events(journal_path(state_path)):
+        if seq is not None and event["seq"] > seq:
+            break
+        if until is not None and event.get("at") and event["at"] > until:
+            break
+        if state is None:
+            state = {}
+        apply_event(state, event)
+    return state
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect or time-travel an ADR state journal")
+    parser.add_argument("state_file", nargs="?", default=STATE_FILE)
+    parser.add_argument("--seq", type=int, help="State right after this journal event")
+    parser.add_argument("--until", help="State as of this ISO 8601 timestamp")
+    parser.add_argument("--compact", action="store_true", help="Rewrite the snapshot from the journal")
+    args = parser.parse_args()
+
+    if args.compact:
+        state = load_current_state(args.state_file)
+        if state is None:
+            print(json.dumps({"status": "error", "message": "No state to compact"}))
+            return 1
+        with locked_journal(journal_path(args.state_file)) as f:
+            state = load_current_state(args.state_file)
+            truncate_partial_line(f)
+            state["journal"] = {"seq": state["version"], "offset": f.tell()}
+            save_state(state, args.state_file)
+        print(json.dumps({"status": "success", "message": "Snapshot compacted", **state["journal"]}))
+        return 0
+
+    if args.seq is None and args.until is None:
+        state = load_current_state(args.state_file)
+    else:
+        state = state_at(args.state_file, args.seq, args.until)
+
+    print(json.dumps(state, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
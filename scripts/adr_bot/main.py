@@ -1,133 +1,58 @@
+import argparse
 import json
 import sys
-import os
 
 from constants import STATE_FILE
-from model import AdrStatus
-from fsm import apply_fsm
-from state_io import load_state, save_state, create_empty_state
-from commands import apply_approve, apply_supersede
-from render import format_section_content
-from errors import bot_error, bot_success
-from utils import is_maintainer
-from parser import parse_adr_commands, AdrParseError
+from journal import run_event
+from payload_io import read_payload_fields, iter_comments
+from errors import success_payload
+from tracing import NULL_TRACER, Tracer
 
 
-READ_ONLY_COMMANDS = {"show", "status"}
+def main(input_file: str, full_replay: bool = False, trace: bool = False, trace_file: str = None) -> int:
+    tracer = Tracer() if trace or trace_file else NULL_TRACER
 
+    # Seuls les champs de tête sont décodés ; les commentaires sont lus en flux
+    with tracer.span("load_payload"):
+        payload = read_payload_fields(input_file)
 
-def main(input_file: str) -> None:
-    with open(input_file) as f:
-        payload = json.load(f)
+    result = run_event(
+        STATE_FILE,
+        lambda: iter_comments(input_file),
+        payload["meta"],
+        full_replay,
+        tracer=tracer
+    )
 
-    comments = payload["comments"]
-    meta = payload["meta"]
+    messages = list(result.messages)
+    if tracer is not NULL_TRACER:
+        # Les durées vont dans le dernier message (le payload final)
+        if not messages:
+            messages.append(success_payload("No /adr command"))
+        messages[-1] = {**messages[-1], "timings": tracer.timings()}
+        if trace_file:
+            tracer.write_chrome_trace(trace_file)
 
-    try:
-        state = load_state(STATE_FILE)
-    except FileNotFoundError:
-        state = create_empty_state(meta)
+    for message in messages:
+        print(json.dumps(message))
 
-    current_status = AdrStatus(state["state"]["status"])
-
-    last_terminal = None
-    last_ctx = {}
-
-    for c in comments:
-        try:
-            commands = parse_adr_commands(c["body"])
-        except AdrParseError as e:
-            bot_error(str(e))
-            return
-
-        if not commands:
-            continue
-
-        for parsed in commands:
-            cmd = parsed["type"]
-
-            # ─────────────────────────────────────────────
-            # Commandes READ-ONLY → bypass FSM
-            # ─────────────────────────────────────────────
-            if cmd in READ_ONLY_COMMANDS:
-                if cmd == "show":
-                    last_terminal = "show"
-                    last_ctx = {"section": parsed.get("section")}
-                continue
-
-            # ─────────────────────────────────────────────
-            # Commandes mutantes → FSM
-            # ─────────────────────────────────────────────
-            try:
-                next_status = apply_fsm(current_status, cmd)
-            except ValueError as e:
-                bot_error(str(e))
-                return
-
-            section = parsed.get("section")
-            content = parsed.get("content")
-
-            if cmd == "fill":
-                state["sections"][section]["content"] = content.strip()
-                bot_success(f"Section '{section}' updated successfully.")
-
-            elif cmd == "append":
-                cur = state["sections"][section]["content"]
-                state["sections"][section]["content"] = (
-                    cur + "\n\n" + content.strip() if cur else content.strip()
-                )
-                bot_success(f"Section '{section}' appended successfully.")
-
-            elif cmd == "approve":
-                if current_status != AdrStatus.PROPOSED:
-                    continue
-                if not is_maintainer(c["author_role"]):
-                    bot_error("Permission denied")
-                    return
-
-                last_terminal = "approve"
-                last_ctx = {
-                    "author": c["author"],
-                    "time": c["created_at"]
-                }
-
-            elif cmd == "supersede":
-                if not is_maintainer(c["author_role"]):
-                    bot_error("Permission denied")
-                    return
-
-                last_terminal = "supersede"
-                last_ctx = {
-                    "author": c["author"],
-                    "time": c["created_at"],
-                    "supersedes": parsed.get("target")
-                }
-
-            current_status = next_status
-            state["state"]["status"] = current_status.value
-
-    # ─────────────────────────────────────────────
-    # Actions terminales
-    # ─────────────────────────────────────────────
-    if last_terminal == "show":
-        bot_success(
-            "ADR content",
-            content=format_section_content(state, last_ctx.get("section"))
-        )
-
-    elif last_terminal == "approve":
-        apply_approve(state, **last_ctx)
-        save_state(state, STATE_FILE)
-        bot_success("ADR approved")
-
-    elif last_terminal == "supersede":
-        apply_supersede(state, **last_ctx)
-        save_state(state, STATE_FILE)
-        bot_success("ADR superseded")
-
-    else:
-        save_state(state, STATE_FILE)
+    return result.exit_code
 
 
 if __name__ == "__main__":
-    main(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Process /adr commands from a discussion payload")
+    parser.add_argument("input_file", help="JSON payload with meta and comments")
+    parser.add_argument(
+        "--full-replay",
+        action="store_true",
+        help="Ignore the saved checkpoint and rebuild the state from all comments"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Add per-phase and per-comment timings to the final JSON message"
+    )
+    parser.add_argument("--trace-file", help="Also write a Chrome trace-event file (implies --trace)")
+    args = parser.parse_args()
+
+    sys.exit(main(args.input_file, args.full_replay, args.trace, args.trace_file))
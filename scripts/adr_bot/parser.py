@@ -1,5 +1,5 @@
 import re
-from typing import List, Dict
+from typing import Dict, Iterator, List
 
 
 class AdrParseError(Exception):
@@ -15,38 +15,74 @@ SUPPORTED_ACTIONS = {
     "supersede",
 }
 
+# Commandes suivies d'un contenu multi-ligne
+CONTENT_ACTIONS = {"fill", "append"}
 
-def parse_adr_commands(comment_body: str) -> List[Dict]:
+# Un seul motif pour tout le tokenizer : lignes de fence (``` / ~~~)
+# et lignes de commande /adr, début de ligne (indentation tolérée)
+TOKEN_PATTERN = re.compile(
+    r"^[ \t]*(?:(?P<fence>`{3,}|~{3,})|(?P<command>/adr))(?P<rest>[^\n]*)",
+    re.MULTILINE,
+)
+
+
+def _content_command(body, action, section, start, end):
+    """Construit une commande fill/append à partir de body[start:end]."""
+    content = body[start:end].strip()
+    if "\r" in content:
+        content = content.replace("\r\n", "\n")
+
+    if not content:
+        raise AdrParseError(
+            f"/adr {action} syntax error: empty content for section '{section}'"
+        )
+
+    return {
+        "type": action,
+        "section": section,
+        "content": content
+    }
+
+
+def iter_adr_commands(comment_body: str) -> Iterator[Dict]:
     """
-    Parse les commandes /adr présentes dans un commentaire GitHub.
+    Itère paresseusement sur les commandes /adr d'un commentaire GitHub.
 
-    Commandes supportées :
-      - /adr fill <section>
-        (contenu multi-ligne jusqu'à la prochaine commande ou EOF)
-      - /adr append <section>
-      - /adr show
-      - /adr approve
-      - /adr supersede
+    Le corps est parcouru une seule fois par TOKEN_PATTERN : le contenu
+    de fill / append est découpé d'un seul slice entre la commande et la
+    commande suivante (ou EOF), sans copie ligne à ligne. Les lignes /adr
+    situées dans un bloc de code délimité sont ignorées.
 
     :param comment_body: Texte brut du commentaire GitHub
-    :return: Liste de commandes structurées
+    :return: Itérateur de commandes structurées
     """
 
-    if not comment_body or not comment_body.strip():
-        return []
+    if not comment_body or "/adr" not in comment_body:
+        return
 
-    lines = comment_body.splitlines()
-    commands: List[Dict] = []
+    fence = None
+    pending = None  # (action, section, début du contenu)
 
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+    for match in TOKEN_PATTERN.finditer(comment_body):
+        marker = match.group("fence")
+        if marker is not None:
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence):
+                fence = None
+            continue
 
-        if not line.startswith("/adr"):
-            i += 1
+        if fence is not None:
             continue
 
-        tokens = line.split()
+        # ─────────────────────────────────────────────
+        # Nouvelle commande : clôture du contenu en cours
+        # ─────────────────────────────────────────────
+        if pending is not None:
+            yield _content_command(comment_body, *pending, match.start())
+            pending = None
+
+        tokens = ("/adr" + match.group("rest")).split()
         if len(tokens) < 2:
             raise AdrParseError("Invalid /adr command")
 
@@ -56,49 +92,51 @@ def parse_adr_commands(comment_body: str) -> List[Dict]:
             raise AdrParseError(f"Unsupported /adr command: {action}")
 
         # ─────────────────────────────────────────────
-        # /adr fill <section>
+        # /adr fill <section> | /adr append <section>
         # ─────────────────────────────────────────────
-        if action == "fill":
+        if action in CONTENT_ACTIONS:
             if len(tokens) != 3:
                 raise AdrParseError(
-                    "Invalid /adr fill syntax. Expected: /adr fill <section>"
-                )
-
-            section = tokens[2]
-            content_lines = []
-
-            i += 1
-            while i < len(lines):
-                current_line = lines[i]
-
-                if current_line.strip().startswith("/adr"):
-                    i -= 1
-                    break
-
-                content_lines.append(current_line)
-                i += 1
-
-            content = "\n".join(content_lines).strip()
-
-            if not content:
-                raise AdrParseError(
-                    f"/adr fill syntax error: empty content for section '{section}'"
+                    f"Invalid /adr {action} syntax. "
+                    f"Expected: /adr {action} <section>"
                 )
+            pending = (action, tokens[2], match.end())
 
-            commands.append({
-                "type": "fill",
-                "section": section,
-                "content": content
-            })
+        # ─────────────────────────────────────────────
+        # /adr show [<section>]
+        # ─────────────────────────────────────────────
+        elif action == "show":
+            command = {"type": action}
+            if len(tokens) > 2:
+                command["section"] = tokens[2]
+            yield command
 
         # ─────────────────────────────────────────────
         # Commandes mono-ligne
         # ─────────────────────────────────────────────
         else:
-            commands.append({
+            yield {
                 "type": action
-            })
+            }
+
+    if pending is not None:
+        yield _content_command(comment_body, *pending, len(comment_body))
+
+
+def parse_adr_commands(comment_body: str) -> List[Dict]:
+    """
+    Parse les commandes /adr présentes dans un commentaire GitHub.
 
-        i += 1
+    Commandes supportées :
+      - /adr fill <section>
+        (contenu multi-ligne jusqu'à la prochaine commande ou EOF)
+      - /adr append <section>
+        (idem, ajouté au contenu existant)
+      - /adr show [<section>]
+      - /adr approve
+      - /adr supersede
 
-    return commands
+    :param comment_body: Texte brut du commentaire GitHub
+    :return: Liste de commandes structurées
+    """
+    return list(iter_adr_commands(comment_body))
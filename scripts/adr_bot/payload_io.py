@@ -0,0 +1,131 @@
+"""
+Lecture en flux des payloads de discussion.
+
+Le payload ({"meta": ..., "comments": [...]}) n'est jamais chargé en
+entier : les champs de premier niveau sont décodés un par un avec
+json.JSONDecoder.raw_decode sur un tampon glissant, et le tableau
+"comments" est itéré commentaire par commentaire. La mémoire reste
+bornée par le plus gros commentaire, pas par la discussion.
+"""
+import json
+
+from constants import PAYLOAD_CHUNK_SIZE
+
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class JsonStream:
+    """Tampon de lecture minimal pour décoder des valeurs JSON successives."""
+
+    def __init__(self, f, chunk_size=PAYLOAD_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Ajoute au moins chunk_size caractères (plus si la valeur en cours est grosse)."""
+        if self.eof:
+            return False
+        data = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Prochain caractère significatif ("" en fin de fichier), sans le consommer."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"Invalid payload: expected one of {chars!r}, found {c or 'EOF'!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # Un nombre en fin de tampon peut être tronqué : relire avant de conclure
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def array(self):
+        """Itère sur les éléments du tableau qui commence à la position courante."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def _members(stream):
+    """Itère sur les clés d'un objet ; l'appelant consomme chaque valeur."""
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.pos += 1
+        return
+
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        yield key
+        if stream.expect(",}") == "}":
+            return
+
+
+def read_payload_fields(path):
+    """
+    Champs de premier niveau du payload (meta, ...), sans les commentaires.
+
+    La lecture s'arrête au tableau "comments" si "meta" le précède (cas
+    du workflow) ; sinon le tableau est parcouru sans être conservé.
+    """
+    fields = {}
+    with open(path, encoding="utf-8") as f:
+        stream = JsonStream(f)
+        for key in _members(stream):
+            if key != "comments":
+                fields[key] = stream.value()
+            elif "meta" in fields:
+                break
+            else:
+                for _ in stream.array():
+                    pass
+    return fields
+
+
+def iter_comments(path):
+    """Itère sur les commentaires du payload, un à la fois."""
+    with open(path, encoding="utf-8") as f:
+        stream = JsonStream(f)
+        for key in _members(stream):
+            if key == "comments":
+                yield from stream.array()
+                return
+            stream.value()
@@ -1,18 +1,95 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from constants import RENDER_CACHE_SIZE
+
+
+# {{section}} : nom sans espace ni accolade, comme le remplacement littéral d'origine
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}\s]+)\}\}")
+
+_render_cache = OrderedDict()
+_render_lock = threading.Lock()
+
+
+@lru_cache(maxsize=32)
+def compile_template(template):
+    """
+    Découpe un template une seule fois en segments : texte littéral (str)
+    ou placeholder {{section}} (tuple à un élément, le nom de section).
+    """
+    segments = []
+    pos = 0
+    for match in PLACEHOLDER_PATTERN.finditer(template):
+        if match.start() > pos:
+            segments.append(template[pos:match.start()])
+        segments.append((match.group(1),))
+        pos = match.end()
+
+    if pos < len(template):
+        segments.append(template[pos:])
+    return tuple(segments)
+
+
+def render_template(segments, sections):
+    """Assemble les segments en un seul join ; un placeholder inconnu reste tel quel."""
+    parts = []
+    for segment in segments:
+        if type(segment) is str:
+            parts.append(segment)
+            continue
+
+        data = sections.get(segment[0])
+        parts.append(data["content"] if data is not None else f"{{{{{segment[0]}}}}}")
+    return "".join(parts)
+
+
+def sections_digest(sections):
+    """Empreinte des sections (noms, ordre et contenus)."""
+    h = hashlib.sha256()
+    for name, data in sections.items():
+        h.update(name.encode("utf-8"))
+        h.update(b"\0")
+        h.update(data["content"].encode("utf-8"))
+        h.update(b"\0")
+    return h.digest()
+
+
+def _cached_render(key, build):
+    with _render_lock:
+        out = _render_cache.get(key)
+        if out is not None:
+            _render_cache.move_to_end(key)
+            return out
+
+    out = build()
+
+    with _render_lock:
+        _render_cache[key] = out
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return out
+
+
 def format_section_content(state, section=None):
     if section:
         return state["sections"][section]["content"]
 
-    out = []
-    for name, data in state["sections"].items():
-        out.append(f"## {name.capitalize()}\n\n{data['content']}")
-    return "\n\n".join(out)
+    sections = state["sections"]
+    return _cached_render(
+        (None, sections_digest(sections)),
+        lambda: "\n\n".join(
+            f"## {name.capitalize()}\n\n{data['content']}"
+            for name, data in sections.items()
+        )
+    )
 
 
 def inject_sections(template, state):
-    body = template
-    for name, data in state["sections"].items():
-        body = body.replace(
-            f"{{{{{name}}}}}",
-            data["content"]
-        )
-    return body
\ No newline at end of file
+    sections = state["sections"]
+    return _cached_render(
+        (template, sections_digest(sections)),
+        lambda: render_template(compile_template(template), sections)
+    )
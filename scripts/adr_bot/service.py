@@ -0,0 +1,300 @@
+"""
+Mode service du bot ADR.
+
+Un processus asyncio reste à l'écoute sur une socket Unix (ou en TCP sur
+localhost) au lieu de relancer Python à chaque commentaire. Le protocole
+est une ligne JSON par requête (même payload que main.py) et une ligne
+JSON par réponse. Les états chargés restent dans un cache LRU borné ;
+les événements d'une même ADR sont sérialisés, ceux d'ADR différentes
+sont traités en parallèle.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+from constants import SERVICE_SOCKET, SERVICE_CACHE_SIZE, SERVICE_MAX_REQUEST_BYTES
+from journal import load_current_state, run_event, state_stamp
+from batch import state_path_for
+from errors import error_payload
+
+
+def error_response(message):
+    """Réponse d'erreur, avec les mêmes clés qu'une réponse de traitement."""
+    return {"ok": False, "exit_code": 1, "stale": False, "messages": [error_payload(message)]}
+
+
+def check_payload(payload):
+    """
+    Forme minimale d'une requête, vérifiée avant tout traitement.
+
+    :raises ValueError: message d'erreur renvoyé au client
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid payload: expected a JSON object")
+    meta = payload.get("meta")
+    if not isinstance(meta, dict) or meta.get("discussion_number") is None:
+        raise ValueError("Invalid payload: meta.discussion_number is required")
+    if not isinstance(payload.get("comments"), list):
+        raise ValueError("Invalid payload: comments must be a list")
+    if not all(isinstance(c, dict) for c in payload["comments"]):
+        raise ValueError("Invalid payload: every comment must be an object")
+    if not isinstance(payload.get("state_path", ""), str):
+        raise ValueError("Invalid payload: state_path must be a string")
+
+
+class StateCache:
+    """
+    Cache LRU des états courants, indexé par chemin d'état.
+
+    Une entrée est ignorée si le snapshot ou le journal ont changé sur
+    disque depuis sa mise en cache (écriture par un autre processus).
+    L'empreinte d'une entrée n'est jamais plus récente que son état :
+    relevée avant la lecture, ou sous le verrou du journal à l'écriture.
+    Partagé entre les threads de traitement, d'où le verrou interne.
+    """
+
+    def __init__(self, maxsize=SERVICE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, state_path):
+        stamp = state_stamp(state_path)
+        with self._lock:
+            entry = self.entries.get(state_path)
+            if entry is not None and entry[0] == stamp:
+                self.entries.move_to_end(state_path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Une écriture entre stamp et lecture rend seulement l'entrée périmée
+        state = load_current_state(state_path)
+        if state is not None:
+            self.put(state_path, state, stamp)
+        return state
+
+    def invalidate(self, state_path):
+        with self._lock:
+            self.entries.pop(state_path, None)
+
+    def put(self, state_path, state, stamp):
+        with self._lock:
+            self.entries[state_path] = (stamp, state)
+            self.entries.move_to_end(state_path)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+class AdrService:
+    def __init__(self, state_dir: Path, cache_size=SERVICE_CACHE_SIZE):
+        self.state_dir = state_dir
+        self.cache = StateCache(cache_size)
+        # Un verrou par ADR, libéré dès que plus personne ne l'attend
+        self.locks = weakref.WeakValueDictionary()
+
+    def lock_for(self, state_path):
+        lock = self.locks.get(state_path)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.locks[state_path] = lock
+        return lock
+
+    def process(self, state_path, payload):
+        """Traitement synchrone d'un payload ; appelé sous le verrou de son ADR."""
+        # state_path peut désigner un sous-dossier de state_dir
+        Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+        result = run_event(
+            state_path,
+            payload["comments"],
+            payload["meta"],
+            payload.get("full_replay", False),
+            load=self.cache.get,
+            on_saved=self.cache.put,
+            on_conflict=self.cache.invalidate
+        )
+
+        return {
+            "ok": result.ok,
+            "exit_code": result.exit_code,
+            "stale": result.stale,
+            "messages": result.messages,
+        }
+
+    async def handle(self, payload):
+        """
+        Réponse à une requête ; toujours une réponse, y compris pour un
+        payload invalide ou une erreur pendant le traitement. Le fichier
+        d'état est toujours résolu sous state_dir.
+        """
+        try:
+            check_payload(payload)
+            state_path = state_path_for(payload, self.state_dir)
+        except ValueError as e:
+            return error_response(str(e))
+
+        try:
+            async with self.lock_for(state_path):
+                return await asyncio.to_thread(self.process, state_path, payload)
+        except Exception as e:
+            return error_response(f"Error processing payload: {type(e).__name__}: {e}")
+
+    async def on_connection(self, reader, writer):
+        """
+        Une connexion peut envoyer plusieurs requêtes, traitées dans l'ordre.
+        Une requête plus longue que SERVICE_MAX_REQUEST_BYTES reçoit une
+        erreur, puis la connexion est fermée (le reste de la ligne est lu
+        et ignoré pour que le client puisse finir d'envoyer et lire la réponse).
+        """
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(json.dumps(error_response(
+                        f"Request too large (limit: {SERVICE_MAX_REQUEST_BYTES} bytes)"
+                    )).encode("utf-8") + b"\n")
+                    await writer.drain()
+                    await _discard_line(reader)
+                    break
+
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    payload = json.loads(line)
+                except ValueError as e:
+                    # JSON invalide ou octets non UTF-8
+                    response = error_response(f"Invalid JSON payload: {e}")
+                else:
+                    response = await self.handle(payload)
+
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            # Arrêt du service avec une connexion encore ouverte
+            pass
+        finally:
+            writer.close()
+
+
+async def _discard_line(reader, chunk_size=64 * 1024):
+    """Lit et ignore l'entrée jusqu'à la fin de la ligne en cours (ou EOF)."""
+    while True:
+        chunk = await reader.read(chunk_size)
+        if not chunk or b"\n" in chunk:
+            return
+
+
+async def serve(service: AdrService, socket_path=None, port=None, host="127.0.0.1"):
+    if port is not None:
+        server = await asyncio.start_server(
+            service.on_connection, host, port, limit=SERVICE_MAX_REQUEST_BYTES
+        )
+        where = f"{host}:{server.sockets[0].getsockname()[1]}"
+    else:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(
+            service.on_connection, socket_path, limit=SERVICE_MAX_REQUEST_BYTES
+        )
+        where = socket_path
+
+    print(json.dumps({"status": "success", "message": f"ADR bot listening on {where}"}), flush=True)
+
+    # SIGTERM (arrêt du runner) → sortie propre, socket supprimée
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        if port is None and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def request(payloads, socket_path=SERVICE_SOCKET, port=None, host="127.0.0.1"):
+    """
+    Client minimal : envoie des payloads sur une connexion et retourne
+    les réponses dans le même ordre.
+    """
+    if port is not None:
+        sock = socket.create_connection((host, port))
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+
+    with sock, sock.makefile("rwb") as stream:
+        responses = []
+        for payload in payloads:
+            stream.write(json.dumps(payload).encode("utf-8") + b"\n")
+            stream.flush()
+            responses.append(json.loads(stream.readline()))
+        return responses
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run adr_bot as a long-lived local service")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    serve_parser = sub.add_parser("serve", help="Listen for discussion payloads")
+    serve_parser.add_argument("--socket", default=SERVICE_SOCKET, help="Unix socket path")
+    serve_parser.add_argument("--port", type=int, help="Listen on localhost TCP instead of a Unix socket")
+    serve_parser.add_argument(
+        "--state-dir",
+        type=Path,
+        default=Path("."),
+        help="Where state files go (a payload state_path is resolved under it)"
+    )
+    serve_parser.add_argument("--cache-size", type=int, default=SERVICE_CACHE_SIZE, help="States kept in memory")
+
+    send_parser = sub.add_parser("send", help="Send a payload file to a running service")
+    send_parser.add_argument("input_file", help="JSON payload with meta and comments")
+    send_parser.add_argument("--socket", default=SERVICE_SOCKET, help="Unix socket path")
+    send_parser.add_argument("--port", type=int, help="Connect to localhost TCP instead of a Unix socket")
+    send_parser.add_argument("--full-replay", action="store_true", help="Ignore the saved checkpoint")
+
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        args.state_dir.mkdir(parents=True, exist_ok=True)
+        service = AdrService(args.state_dir, args.cache_size)
+        try:
+            asyncio.run(serve(service, args.socket, args.port))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    with open(args.input_file) as f:
+        payload = json.load(f)
+    if args.full_replay:
+        payload["full_replay"] = True
+
+    try:
+        [response] = request([payload], args.socket, args.port)
+    except OSError as e:
+        print(json.dumps(error_payload(f"ADR bot service unreachable: {e}")))
+        return 1
+
+    for message in response["messages"]:
+        print(json.dumps(message))
+    return response["exit_code"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,14 @@
+import hashlib
 import json
+import os
+import tempfile
 from model import AdrStatus
-from constants import REQUIRED_SECTIONS
+from constants import REQUIRED_SECTIONS, CHECKPOINT_PRINT_BYTES
+
+# Issue de consume_checkpoint
+RESUMED = "resumed"
+STALE = "stale"
+DIVERGED = "diverged"
 
 
 def create_empty_state(meta):
@@ -28,5 +36,117 @@ def load_state(path):
 
 
 def save_state(state, path):
-    with open(path, "w") as f:
-        json.dump(state, f, indent=2)
+    """
+    Écriture atomique : fichier temporaire dans le même dossier, fsync,
+    puis rename. Un lecteur voit l'ancien ou le nouvel état, jamais un
+    fichier à moitié écrit.
+    """
+    fd, tmp = tempfile.mkstemp(
+        prefix=".adr_state.", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path))
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class CommentDigest:
+    """
+    Empreinte incrémentale des commentaires déjà traités.
+
+    Couvre tous les champs qui influencent le traitement, pour détecter
+    un commentaire édité, supprimé ou réordonné avant le checkpoint.
+    Mise à jour commentaire par commentaire, elle suit un flux sans
+    conserver les commentaires. Une empreinte courte par commentaire
+    (prints) permet en plus de reconnaître un préfixe des commentaires
+    déjà traités.
+    """
+
+    def __init__(self):
+        self.h = hashlib.sha256()
+        self.count = 0
+        self.last = {}
+        self.prints = []
+
+    def update(self, c):
+        line = json.dumps(
+            [c.get("id"), c["author"], c["author_role"], c["created_at"], c["body"]],
+            ensure_ascii=False
+        ).encode("utf-8")
+        self.h.update(line)
+        self.h.update(b"\n")
+        self.prints.append(hashlib.blake2b(line, digest_size=CHECKPOINT_PRINT_BYTES).hexdigest())
+        self.count += 1
+        self.last = c
+
+    def hexdigest(self):
+        return self.h.hexdigest()
+
+    def checkpoint(self, prints_from=0):
+        """
+        Checkpoint à émettre ; seules les empreintes à partir du
+        commentaire prints_from (déjà couvertes avant) y figurent.
+        """
+        return {
+            "count": self.count,
+            "last_id": self.last.get("id"),
+            "last_created_at": self.last.get("created_at"),
+            "digest": self.hexdigest(),
+            "prints": "".join(self.prints[prints_from:]),
+            "prints_from": prints_from,
+        }
+
+
+def is_behind(checkpoint, stored):
+    """
+    checkpoint couvre un préfixe strict des commentaires du checkpoint
+    stored : il vient d'un payload en retard.
+    """
+    if not checkpoint or not stored or "prints" not in checkpoint or "prints" not in stored:
+        return False
+    return (
+        checkpoint["count"] < stored["count"]
+        and stored["prints"].startswith(checkpoint["prints"])
+    )
+
+
+def consume_checkpoint(state, comments, digest):
+    """
+    Consomme dans l'itérateur comments le préfixe couvert par le
+    checkpoint de state, en mettant digest à jour.
+
+    :return: RESUMED si les commentaires prolongent le checkpoint ;
+             STALE s'ils s'arrêtent avant, en restant un préfixe des
+             commentaires déjà traités (payload en retard : rien à faire) ;
+             DIVERGED si le checkpoint est absent ou ne correspond plus
+             (commentaire édité, supprimé ou réordonné) : il faut alors
+             rejouer depuis un état vide
+    """
+    checkpoint = state.get("checkpoint")
+    if not checkpoint:
+        return DIVERGED
+
+    count = checkpoint["count"]
+    # Checkpoint antérieur aux empreintes : seul le digest complet est vérifiable
+    prints = checkpoint.get("prints")
+    width = 2 * CHECKPOINT_PRINT_BYTES
+
+    if count:
+        for c in comments:
+            digest.update(c)
+            n = digest.count
+            if prints is not None and digest.prints[-1] != prints[(n - 1) * width:n * width]:
+                return DIVERGED
+            if n == count:
+                break
+
+    if digest.count == count:
+        return RESUMED if digest.hexdigest() == checkpoint["digest"] else DIVERGED
+    return STALE if prints is not None else DIVERGED
@@ -0,0 +1,80 @@
+"""
+Instrumentation optionnelle du bot ADR.
+
+Un Tracer enregistre des spans horodatés à l'horloge monotone (phase ou
+commentaire) ; timings() les agrège pour la sortie JSON et
+write_chrome_trace() les exporte au format Chrome trace-event
+(chrome://tracing, Perfetto). Sans --trace, NULL_TRACER ne mesure rien.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+class Tracer:
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.spans = []  # (nom, catégorie, début ns, fin ns, args)
+
+    @contextlib.contextmanager
+    def span(self, name, cat="phase", **args):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.spans.append((
+                name, cat, start - self.origin, time.perf_counter_ns() - self.origin, args
+            ))
+
+    def timings(self):
+        """
+        Durées en millisecondes : total, cumul par phase et détail par
+        commentaire (dans l'ordre de traitement).
+        """
+        phases = {}
+        comments = []
+        for name, cat, start, end, args in self.spans:
+            ms = (end - start) / 1e6
+            if cat == "comment":
+                comments.append({**args, "ms": round(ms, 3)})
+            else:
+                phases[name] = phases.get(name, 0.0) + ms
+
+        return {
+            "total_ms": round((time.perf_counter_ns() - self.origin) / 1e6, 3),
+            "phases": {name: round(ms, 3) for name, ms in phases.items()},
+            "comments": comments,
+        }
+
+    def write_chrome_trace(self, path):
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = [
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": start / 1e3,
+                "dur": (end - start) / 1e3,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            }
+            for name, cat, start, end, args in sorted(self.spans, key=lambda s: s[2])
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class NullTracer:
+    """Tracer désactivé : span() ne mesure rien."""
+
+    _span = contextlib.nullcontext()
+
+    def span(self, name, cat="phase", **args):
+        return self._span
+
+
+NULL_TRACER = NullTracer()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark generate_doc_graph.py on synthetic docs trees
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import generate_doc_graph as dg
+
+SHAPES = ("wide", "deep", "balanced")
+DEFAULT_SIZES = (1000, 10000)
+BALANCED_FANOUT = 10
+# Une chaîne unique de 500k pages produirait un NAVIGATION.md quadratique
+# (indentation), les arbres "deep" sont donc des chaînes de cette longueur
+DEEP_CHAIN_LENGTH = 1000
+FILES_PER_DIR = 1000
+
+def parent_index(shape, i):
+    """Index du parent de la page i, ou None pour une page racine"""
+    if i == 0:
+        return None
+    if shape == "wide":
+        return 0
+    if shape == "deep":
+        return None if i % DEEP_CHAIN_LENGTH == 0 else i - 1
+    if shape == "balanced":
+        return (i - 1) // BALANCED_FANOUT
+    raise ValueError(f"Unknown shape: {shape}")
+
+def generate_tree_files(root, shape, size):
+    """Écrit size pages avec un frontmatter valide sous root/docs"""
+    docs = root / "docs"
+    for i in range(size):
+        directory = docs / f"d{i // FILES_PER_DIR:04d}"
+        if i % FILES_PER_DIR == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+
+        parent = parent_index(shape, i)
+        lines = ["---", f"title: Page {i}", f"nav_order: {i}"]
+        if parent is not None:
+            lines.append(f"parent: Page {parent}")
+        lines += ["---", "", f"# Page {i}", "", "Synthetic benchmark page.", ""]
+
+        (directory / f"p{i}.md").write_text("\n".join(lines), encoding="utf-8")
+
+def run_phases(jobs, trace_memory):
+    """Exécute chaque phase du générateur et mesure temps et pic mémoire"""
+    results = {}
+    state = {}
+
+    phases = [
+        ("load_pages", lambda: state.update(pages=dg.load_pages(None, jobs))),
+        ("validate_parents", lambda: dg.validate_parents(state["pages"])),
+        ("detect_cycles", lambda: dg.detect_cycles(state["pages"])),
+        ("build_graph", lambda: state.update(graph=dg.DocGraph(state["pages"]))),
+        ("validate_nav_order", lambda: dg.validate_nav_order(state["pages"], graph=state["graph"])),
+        ("generate_tree", lambda: state.update(tree=dg.generate_tree(state["pages"], state["graph"]))),
+    ]
+
+    for name, phase in phases:
+        if trace_memory:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        phase()
+        elapsed = time.perf_counter() - start
+
+        size = len(state["pages"])
+        results[name] = {
+            "seconds": round(elapsed, 6),
+            "pages_per_second": round(size / elapsed) if elapsed else None,
+        }
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            results[name]["peak_bytes"] = peak - base
+
+    return results
+
+def benchmark(shape, size, jobs, trace_memory):
+    with tempfile.TemporaryDirectory(prefix="doc-graph-bench-") as tmp:
+        root = Path(tmp)
+
+        start = time.perf_counter()
+        generate_tree_files(root, shape, size)
+        setup = time.perf_counter() - start
+
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            phases = run_phases(jobs, trace_memory)
+        finally:
+            os.chdir(cwd)
+
+    total = sum(p["seconds"] for p in phases.values())
+    return {
+        "shape": shape,
+        "pages": size,
+        "jobs": jobs,
+        "setup_seconds": round(setup, 6),
+        "total_seconds": round(total, 6),
+        "pages_per_second": round(size / total) if total else None,
+        "phases": phases,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the doc-graph generator on synthetic docs trees")
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help="Number of pages per tree (e.g. 1000 10000 500000)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Worker processes for load_pages (0 = one per CPU)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc peak memory tracking (faster, less overhead)")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file")
+
+    args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+    trace_memory = not args.no_memory
+
+    if trace_memory:
+        tracemalloc.start()
+
+    runs = []
+    for shape in args.shapes:
+        for size in args.sizes:
+            print(f"⏱️  {shape} / {size} pages...", file=sys.stderr)
+            runs.append(benchmark(shape, size, jobs, trace_memory))
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "memory_tracked": trace_memory,
+        "runs": runs,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,59 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import time
 import yaml
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from urllib.parse import unquote
 from collections import defaultdict
 
 DOCS_DIR = Path("docs")
 OUTPUT_FILE = Path("docs/NAVIGATION.md")
+CACHE_FILE = Path(".cache/doc-graph/frontmatter.json")
+CACHE_VERSION = 2
+FRONTMATTER_MAX_BYTES = 64 * 1024
+FRONTMATTER_CHUNK_SIZE = 4096
+# Frontmatter plat : sous-ensemble de YAML parsé sans passer par le loader
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_NULL = {"~", "null", "Null", "NULL"}
+YAML_TRUE = {"yes", "Yes", "YES", "true", "True", "TRUE", "on", "On", "ON"}
+YAML_FALSE = {"no", "No", "NO", "false", "False", "FALSE", "off", "Off", "OFF"}
+YAML_SPECIAL_KEYS = YAML_NULL | YAML_TRUE | YAML_FALSE
+YAML_INDICATORS = set("[]{},&*!|>%@`#?:<=")
+FLAT_LINE_PATTERN = re.compile(r"([A-Za-z_][\w-]*):(?: +(.*?))? *")
+FLAT_INT_PATTERN = re.compile(r"0|[-+]?[1-9][0-9]*")
+FLAT_FLOAT_PATTERN = re.compile(r"[-+]?(?:0|[1-9][0-9]*)\.[0-9]+")
+FLAT_FALLBACK = object()
+# Un seul passage par fichier : blocs de code, spans de code, titres, liens
+LINK_PATTERN = re.compile(
+    r"(?P<fence>^[ \t]*(?P<fmark>`{3,}|~{3,})[^\n]*\n(?s:.*?)^[ \t]*(?P=fmark)[ \t]*$)"
+    r"|(?P<code>`[^`\n]+`)"
+    r"|^#{1,6}[ \t]+(?P<heading>[^\n]+?)[ \t]*#*[ \t]*$"
+    r"|!?\[[^\]\n]*\]\((?P<target>[^)\n]*)\)",
+    re.MULTILINE,
+)
+EXTERNAL_LINK_PATTERN = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|/|\{\{)")
+HEADING_ID_PATTERN = re.compile(r"\{:?\s*#([\w-]+)[^}]*\}\s*$")
+INLINE_MARKUP_PATTERN = re.compile(r"\[([^\]]*)\]\([^)]*\)|[`*_]")
+WATCH_INTERVAL = 0.2
+INDEX_VERSION = 1
+INDEX_MAGIC = b"NAVG"
+INDEX_HEADER = struct.Struct("<4sHHII")
+INDEX_NODE = struct.Struct("<iIdIIII")
 
 class DocError(Exception):
     pass
 
 class Page:
+    __slots__ = ("title", "parent", "nav_order", "path", "is_index")
+    
     def __init__(self, title, parent, nav_order, path):
         self.title = title
         self.parent = parent
@@ -16,51 +61,522 @@ class Page:
         self.path = path
         self.is_index = path.name == "index.md"
 
-def load_pages():
-    pages = {}
-    for md in DOCS_DIR.rglob("*.md"):
-        # Ignorer le fichier de navigation généré
-        if md == OUTPUT_FILE:
-            continue
-            
-        with md.open() as f:
-            content = f.read()
+class DocGraph:
+    """
+    Index compact de l'arborescence, construit une seule fois depuis pages.
+
+    Les pages reçoivent un identifiant entier ; les enfants de chaque nœud
+    sont stockés dans un tableau plat (format CSR) trié par nav_order, la
+    racine virtuelle ayant l'identifiant len(nodes). Suppose des parents
+    déjà validés (voir validate_hierarchy).
+    """
+    __slots__ = ("nodes", "root", "offsets", "children")
+    
+    def __init__(self, pages):
+        self.nodes = list(pages.values())
+        n = len(self.nodes)
+        self.root = n
+        index = {page.title: i for i, page in enumerate(self.nodes)}
+        
+        parent_ids = array("l", [
+            index[page.parent] if page.parent else n for page in self.nodes
+        ])
+        
+        # offsets[i]:offsets[i + 1] délimite les enfants du nœud i
+        offsets = array("l", bytes(array("l").itemsize * (n + 2)))
+        for pid in parent_ids:
+            offsets[pid + 1] += 1
+        for i in range(n + 1):
+            offsets[i + 1] += offsets[i]
         
-        if not content.startswith("---"):
-            raise DocError(f"Missing frontmatter in {md}")
+        children = array("l", bytes(array("l").itemsize * n))
+        fill = array("l", offsets)
+        for i, pid in enumerate(parent_ids):
+            children[fill[pid]] = i
+            fill[pid] += 1
+        
+        # Tri stable : à nav_order égal, l'ordre de chargement est conservé
+        nodes = self.nodes
+        for nid in range(n + 1):
+            start, end = offsets[nid], offsets[nid + 1]
+            if end - start > 1:
+                children[start:end] = array("l", sorted(
+                    children[start:end], key=lambda i: nodes[i].nav_order
+                ))
+        
+        self.offsets = offsets
+        self.children = children
+    
+    def child_ids(self, nid):
+        return self.children[self.offsets[nid]:self.offsets[nid + 1]]
+    
+    def has_children(self, nid):
+        return self.offsets[nid + 1] > self.offsets[nid]
+    
+    def groups(self):
+        """Itère sur (clé du parent, enfants triés) ; "__ROOT__" pour la racine"""
+        if self.has_children(self.root):
+            yield "__ROOT__", [self.nodes[i] for i in self.child_ids(self.root)]
+        for nid, page in enumerate(self.nodes):
+            if self.has_children(nid):
+                yield page.title, [self.nodes[i] for i in self.child_ids(nid)]
+    
+    def walk(self):
+        """Parcours préfixe itératif : (id, niveau) dans l'ordre d'affichage"""
+        stack = [(nid, 0) for nid in reversed(self.child_ids(self.root))]
+        while stack:
+            nid, level = stack.pop()
+            yield nid, level
+            stack.extend((c, level + 1) for c in reversed(self.child_ids(nid)))
+
+def read_frontmatter(md, max_bytes=FRONTMATTER_MAX_BYTES):
+    """
+    Lit uniquement le bloc de frontmatter d'une page, sans charger le corps.
+
+    La lecture s'arrête au délimiteur `---` fermant ; une erreur est levée
+    s'il n'apparaît pas dans les max_bytes premiers octets.
+    """
+    buf = bytearray()
+    with md.open("rb") as f:
+        while True:
+            chunk = f.read(FRONTMATTER_CHUNK_SIZE)
+            if not chunk:
+                break
+            
+            start = max(3, len(buf) - 2)
+            buf += chunk
+            if len(buf) >= 3 and not buf.startswith(b"---"):
+                raise DocError(f"Missing frontmatter in {md}")
+            
+            end = buf.find(b"---", start, max_bytes)
+            if end != -1:
+                return bytes(buf[3:end])
+            
+            if len(buf) >= max_bytes:
+                raise DocError(
+                    f"Closing frontmatter delimiter not found within "
+                    f"{max_bytes} bytes in {md}"
+                )
+    
+    if not buf.startswith(b"---"):
+        raise DocError(f"Missing frontmatter in {md}")
+    raise DocError(f"Malformed frontmatter in {md}")
+
+def split_frontmatter(md, raw, max_bytes=FRONTMATTER_MAX_BYTES):
+    """Variante de read_frontmatter pour un contenu déjà lu ; retourne la fin du bloc"""
+    if not raw.startswith(b"---"):
+        raise DocError(f"Missing frontmatter in {md}")
+    
+    end = raw.find(b"---", 3, max_bytes)
+    if end != -1:
+        return end
+    
+    if len(raw) >= max_bytes:
+        raise DocError(
+            f"Closing frontmatter delimiter not found within "
+            f"{max_bytes} bytes in {md}"
+        )
+    raise DocError(f"Malformed frontmatter in {md}")
+
+def parse_flat_scalar(value):
+    """
+    Valeur d'une ligne `clé: valeur` plate, avec les règles de résolution de
+    yaml.safe_load ; FLAT_FALLBACK si elle sort du sous-ensemble supporté.
+    """
+    if not value:
+        return None
+    
+    first = value[0]
+    if first == '"':
+        inner = value[1:-1]
+        if len(value) >= 2 and value[-1] == '"' and '"' not in inner and "\\" not in inner:
+            return inner
+        return FLAT_FALLBACK
+    if first == "'":
+        inner = value[1:-1]
+        if len(value) >= 2 and value[-1] == "'" and "'" not in inner:
+            return inner
+        return FLAT_FALLBACK
+    
+    if value in YAML_NULL:
+        return None
+    if value in YAML_TRUE:
+        return True
+    if value in YAML_FALSE:
+        return False
+    if FLAT_INT_PATTERN.fullmatch(value):
+        return int(value)
+    if FLAT_FLOAT_PATTERN.fullmatch(value):
+        return float(value)
+    
+    # Indicateurs YAML, nombres/dates non triviaux, commentaires, mappings
+    if (first in YAML_INDICATORS or first in "0123456789+-."
+            or ": " in value or " #" in value or "\t" in value or value.endswith(":")):
+        return FLAT_FALLBACK
+    return value
+
+def parse_flat_frontmatter(lines):
+    """
+    Parse rapide d'un frontmatter plat `clé: valeur`, en relevant les numéros
+    de ligne de chaque clé pour la détection des doublons.
+
+    Retourne (valeurs, clés vues) ou None si une ligne sort du format plat.
+    """
+    values = {}
+    keys_seen = defaultdict(list)
+    for line_num, line in enumerate(lines, 1):
+        # Seuls les espaces sont sûrs : une tabulation (ou tout autre blanc)
+        # est laissée à YAML, qui peut rejeter la ligne
+        stripped = line.strip(" \r")
+        if not stripped or stripped.startswith('#'):
+            continue
         
-        parts = content.split("---", 2)
-        if len(parts) < 3:
-            raise DocError(f"Malformed frontmatter in {md}")
+        m = FLAT_LINE_PATTERN.fullmatch(line.rstrip("\r"))
+        if not m or m.group(1) in YAML_SPECIAL_KEYS:
+            return None
         
-        fm_text = parts[1]
+        value = parse_flat_scalar(m.group(2))
+        if value is FLAT_FALLBACK:
+            return None
         
-        # Vérifier les clés dupliquées
-        lines = fm_text.strip().split('\n')
+        values[m.group(1)] = value
+        keys_seen[m.group(1)].append(line_num)
+    
+    if not values:
+        return None
+    return values, keys_seen
+
+def parse_frontmatter(md, fm_text):
+    """Extrait (title, parent, nav_order) du texte de frontmatter d'une page"""
+    lines = fm_text.strip().split('\n')
+    
+    # Chemin rapide : frontmatter plat parsé et vérifié en une passe
+    # (une première ligne indentée n'est pas plate, strip() la masquerait)
+    flat = None
+    if not fm_text.lstrip("\r\n")[:1].isspace():
+        flat = parse_flat_frontmatter(lines)
+    if flat is not None:
+        fm, keys_seen = flat
+    else:
+        fm = None
         keys_seen = defaultdict(list)
         for line_num, line in enumerate(lines, 1):
             if ':' in line and not line.strip().startswith('#'):
                 key = line.split(':', 1)[0].strip()
                 keys_seen[key].append(line_num)
+    
+    # Vérifier les clés dupliquées
+    duplicates = {k: v for k, v in keys_seen.items() if len(v) > 1}
+    if duplicates:
+        dup_details = ", ".join([f"'{k}' (lines {v})" for k, v in duplicates.items()])
+        raise DocError(f"Duplicate frontmatter keys in {md}: {dup_details}")
+    
+    if fm is None:
+        fm = yaml.load(fm_text, Loader=YAML_LOADER)
+    
+    title = fm.get("title")
+    nav_order = fm.get("nav_order")
+    parent = fm.get("parent")
+    
+    if not title or nav_order is None:
+        raise DocError(f"Missing title or nav_order in {md}")
+    
+    return title, parent, nav_order
+
+def is_json_native(value):
+    """Valeur qui revient identique après un aller-retour JSON"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return True
+    if isinstance(value, list):
+        return all(is_json_native(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and is_json_native(v) for k, v in value.items())
+    return False
+
+class FrontmatterCache:
+    """
+    Cache disque des frontmatters déjà parsés.
+
+    Une entrée est réutilisée si (mtime, taille) n'ont pas changé, ou à
+    défaut si le hash du contenu est identique (cas d'un checkout CI qui
+    réinitialise les mtimes).
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self.entries = data.get("entries", {})
+    
+    def lookup(self, md, with_links=False):
+        """
+        Retourne (meta, digest_connu).
+
+        meta vaut (title, parent, nav_order) si (mtime, taille) correspondent,
+        sinon None ; digest_connu permet alors d'éviter un nouveau parse.
+        Avec with_links, l'entrée doit aussi contenir les liens de la page
+        et le digest connu porte sur le contenu complet.
+        """
+        entry = self.entries.get(str(md))
+        if entry is None:
+            return None, None
+        
+        if with_links and "links" not in entry:
+            return None, None
+        
+        st = md.stat()
+        if entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            self.hits += 1
+            return (entry["title"], entry["parent"], entry["nav_order"]), None
+        
+        return None, entry["content_sha256"] if with_links else entry["sha256"]
+    
+    def scan(self, md):
+        """Liens et ancres mémorisés pour une page (voir scan_links)"""
+        entry = self.entries[str(md)]
+        return {"anchors": entry["anchors"], "links": entry["links"]}
+    
+    def store(self, md, mtime_ns, size, digest, meta, scan=None, with_links=False):
+        """Enregistre le résultat de read_page ; meta=None signifie contenu inchangé"""
+        key = str(md)
+        previous = self.entries.get(key)
+        if meta is None:
+            # Contenu inchangé, seul le mtime a bougé
+            self.hits += 1
+            meta = previous["title"], previous["parent"], previous["nav_order"]
+        else:
+            self.misses += 1
         
-        duplicates = {k: v for k, v in keys_seen.items() if len(v) > 1}
-        if duplicates:
-            dup_details = ", ".join([f"'{k}' (lines {v})" for k, v in duplicates.items()])
-            raise DocError(f"Duplicate frontmatter keys in {md}: {dup_details}")
+        if not all(is_json_native(value) for value in meta):
+            # Date YAML, etc. : pas de forme JSON fidèle, la page sera reparsée
+            if self.entries.pop(key, None) is not None:
+                self._dirty = True
+            return meta
         
-        fm = yaml.safe_load(fm_text)
+        title, parent, nav_order = meta
+        entry = {
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "sha256": digest,
+            "title": title,
+            "parent": parent,
+            "nav_order": nav_order,
+        }
+        if scan is not None:
+            entry.update(scan)
+        elif with_links:
+            # Contenu complet identique : les liens mémorisés restent valides
+            for field in ("content_sha256", "anchors", "links"):
+                entry[field] = previous[field]
         
-        title = fm.get("title")
-        nav_order = fm.get("nav_order")
-        parent = fm.get("parent")
+        self.entries[key] = entry
+        self._dirty = True
+        return meta
+    
+    def prune(self, seen):
+        """Supprime les entrées des fichiers qui n'existent plus"""
+        stale = self.entries.keys() - seen
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
+    
+    def save(self):
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps({"version": CACHE_VERSION, "entries": self.entries}),
+            encoding="utf-8"
+        )
+        self._dirty = False
+
+def add_page(pages, md, meta):
+    title, parent, nav_order = meta
+    
+    if title in pages:
+        raise DocError(f"Duplicate title '{title}' in {md} and {pages[title].path}")
+    
+    pages[title] = Page(title, parent, nav_order, md)
+
+def heading_anchors(text, seen):
+    """
+    Ancres générées pour un titre : identifiant explicite `{#id}` sinon
+    slugs style GitHub (avec suffixe -1, -2... en cas de doublon) et kramdown.
+    """
+    custom = HEADING_ID_PATTERN.search(text)
+    if custom:
+        return [custom.group(1)]
+    
+    text = INLINE_MARKUP_PATTERN.sub(lambda m: m.group(1) or "", text)
+    
+    slug = re.sub(r"[^\w\- ]", "", text.lower()).replace(" ", "-")
+    count = seen.get(slug, 0)
+    seen[slug] = count + 1
+    github = f"{slug}-{count}" if count else slug
+    
+    kramdown = re.sub(r"^[^a-zA-Z]+", "", text)
+    kramdown = re.sub(r"[^a-zA-Z0-9 -]", "", kramdown).replace(" ", "-").lower()
+    
+    return [github, kramdown] if kramdown != github else [github]
+
+def scan_links(body, first_line=1):
+    """
+    Collecte ancres et liens relatifs du corps d'une page en un seul passage
+    de LINK_PATTERN ; les blocs et spans de code sont ignorés.
+    """
+    anchors, links, seen = [], [], {}
+    line, pos = first_line, 0
+    
+    for m in LINK_PATTERN.finditer(body):
+        line += body.count("\n", pos, m.start())
+        pos = m.start()
         
-        if not title or nav_order is None:
-            raise DocError(f"Missing title or nav_order in {md}")
+        if m.group("heading") is not None:
+            anchors.extend(heading_anchors(m.group("heading"), seen))
+        elif m.group("target") is not None:
+            target = m.group("target").strip()
+            if target and not EXTERNAL_LINK_PATTERN.match(target):
+                links.append([line, target])
+    
+    return {"anchors": anchors, "links": links}
+
+def read_page(md, known_digest=None, max_bytes=FRONTMATTER_MAX_BYTES, with_links=False):
+    """
+    Lit et parse une page (exécuté dans un worker en mode parallèle).
+
+    Retourne (mtime_ns, size, sha256, meta, scan) ; le hash porte sur le seul
+    frontmatter et meta vaut None s'il correspond à known_digest, le parse
+    est alors sauté.
+
+    Avec with_links, le fichier est lu en entier une seule fois : scan
+    contient ses liens et ancres, et known_digest porte sur tout le contenu.
+    """
+    st = md.stat()
+    if not with_links:
+        raw = read_frontmatter(md, max_bytes)
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == known_digest:
+            return st.st_mtime_ns, st.st_size, digest, None, None
+        return st.st_mtime_ns, st.st_size, digest, parse_frontmatter(md, raw.decode("utf-8")), None
+    
+    raw = md.read_bytes()
+    end = split_frontmatter(md, raw, max_bytes)
+    digest = hashlib.sha256(raw[3:end]).hexdigest()
+    content_digest = hashlib.sha256(raw).hexdigest()
+    if content_digest == known_digest:
+        return st.st_mtime_ns, st.st_size, digest, None, None
+    
+    meta = parse_frontmatter(md, raw[3:end].decode("utf-8"))
+    scan = scan_links(raw[end + 3:].decode("utf-8"), raw.count(b"\n", 0, end + 3) + 1)
+    scan["content_sha256"] = content_digest
+    return st.st_mtime_ns, st.st_size, digest, meta, scan
+
+class LinkIndex:
+    """
+    Liens et ancres collectés pendant load_pages, vérifiés ensuite contre
+    l'index des pages connues sans relire aucun fichier.
+    """
+    
+    def __init__(self):
+        self.anchors = {}
+        self.links = {}
+    
+    def add(self, md, scan):
+        key = os.path.normpath(md)
+        self.anchors[key] = set(scan["anchors"])
+        self.links[key] = scan["links"]
+    
+    def count(self):
+        return sum(len(links) for links in self.links.values())
+    
+    def broken(self):
+        """Retourne [(page, ligne, cible, raison)] pour chaque lien interne cassé"""
+        docs_root = os.path.normpath(DOCS_DIR)
+        broken = []
         
-        if title in pages:
-            raise DocError(f"Duplicate title '{title}' in {md} and {pages[title].path}")
+        for source, links in self.links.items():
+            for line, target in links:
+                # Retirer un éventuel titre : [texte](cible "titre")
+                path_part = target.split(" \"", 1)[0].strip("<> ")
+                path_part, _, anchor = path_part.partition("#")
+                path_part = unquote(path_part.split("?", 1)[0])
+                
+                if not path_part:
+                    dest = source
+                else:
+                    dest = os.path.normpath(os.path.join(os.path.dirname(source), path_part))
+                    if path_part.endswith("/") or os.path.isdir(dest):
+                        dest = os.path.join(dest, "index.md")
+                
+                inside_docs = dest.startswith(docs_root + os.sep)
+                if dest.endswith(".md") and inside_docs:
+                    if dest not in self.anchors and dest != os.path.normpath(OUTPUT_FILE):
+                        broken.append((source, line, target, "page not found"))
+                        continue
+                elif not os.path.exists(dest):
+                    broken.append((source, line, target, "file not found"))
+                    continue
+                
+                if anchor and dest in self.anchors and anchor not in self.anchors[dest]:
+                    broken.append((source, line, target, f"anchor '#{anchor}' not found"))
         
-        pages[title] = Page(title, parent, nav_order, md)
+        return broken
+
+def load_pages(cache=None, jobs=1, max_bytes=FRONTMATTER_MAX_BYTES, links=None):
+    files = [md for md in DOCS_DIR.rglob("*.md") if md != OUTPUT_FILE]
+    
+    # Résolution via le cache ; seules les pages restantes sont lues
+    metas = [None] * len(files)
+    pending, known_digests = [], []
+    for i, md in enumerate(files):
+        if cache is not None:
+            metas[i], known = cache.lookup(md, links is not None)
+            if metas[i] is not None:
+                continue
+        else:
+            known = None
+        pending.append(md)
+        known_digests.append(known)
+    
+    reader = partial(read_page, max_bytes=max_bytes, with_links=links is not None)
+    pool = None
+    if jobs > 1 and len(pending) > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        chunksize = max(1, len(pending) // (jobs * 4))
+        results = pool.map(reader, pending, known_digests, chunksize=chunksize)
+    else:
+        results = map(reader, pending, known_digests)
+    
+    # Fusion dans l'ordre de parcours : mêmes erreurs qu'en séquentiel
+    pages = {}
+    try:
+        for md, meta in zip(files, metas):
+            scan = None
+            if meta is None:
+                mtime_ns, size, digest, meta, scan = next(results)
+                if cache is not None:
+                    meta = cache.store(md, mtime_ns, size, digest, meta, scan, links is not None)
+            
+            add_page(pages, md, meta)
+            
+            if links is not None:
+                links.add(md, scan if scan is not None else cache.scan(md))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    
+    if cache is not None:
+        cache.prune({str(md) for md in files})
     
     return pages
 
@@ -72,24 +588,57 @@ def validate_parents(pages):
             if page.parent == page.title:
                 raise DocError(f"Page cannot be its own parent: {page.title}")
 
-def detect_cycles(pages):
-    def visit(title, stack):
-        if title in stack:
-            raise DocError(f"Cycle detected: {' -> '.join(stack + [title])}")
-        page = pages[title]
-        if page.parent:
-            visit(page.parent, stack + [title])
+def validate_hierarchy(pages, starts=None):
+    """
+    Valide les parents et détecte les cycles en une seule passe itérative.
+
+    Coloriage : chaque chaîne de parents est remontée jusqu'à la racine ou
+    jusqu'à une page déjà validée, si bien que chaque page n'est visitée
+    qu'une fois et la profondeur n'est pas limitée par la pile Python.
+    starts restreint la validation aux chaînes partant de ces titres.
+    """
+    VISITING, DONE = 1, 2
+    state = {}
     
-    for title in pages:
-        visit(title, [])
+    for start in (pages if starts is None else starts):
+        if start in state:
+            continue
+        
+        path = []
+        title = start
+        while True:
+            state[title] = VISITING
+            path.append(title)
+            page = pages[title]
+            if not page.parent:
+                break
+            if page.parent not in pages:
+                raise DocError(f"Parent '{page.parent}' not found for {page.path}")
+            if page.parent == page.title:
+                raise DocError(f"Page cannot be its own parent: {page.title}")
+            
+            mark = state.get(page.parent)
+            if mark == DONE:
+                break
+            if mark == VISITING:
+                raise DocError(f"Cycle detected: {' -> '.join(path + [page.parent])}")
+            title = page.parent
+        
+        for title in path:
+            state[title] = DONE
 
-def validate_nav_order(pages):
-    children = defaultdict(list)
-    for page in pages.values():
-        parent = page.parent or "__ROOT__"
-        children[parent].append(page)
+def detect_cycles(pages):
+    validate_hierarchy(pages)
+
+def validate_nav_order(pages, parents=None, graph=None):
+    """parents restreint la vérification à ces groupes de frères ("__ROOT__" pour la racine)"""
+    if graph is None:
+        graph = DocGraph(pages)
     
-    for parent, group in children.items():
+    for parent, group in graph.groups():
+        if parents is not None and parent not in parents:
+            continue
+        
         seen = {}
         for page in group:
             if page.nav_order in seen:
@@ -110,16 +659,10 @@ def validate_nav_order(pages):
                 )
             seen[page.nav_order] = page
 
-def generate_tree(pages):
+def generate_tree(pages, graph=None):
     """Génère l'arborescence de navigation en format Markdown"""
-    children = defaultdict(list)
-    for page in pages.values():
-        parent = page.parent or "__ROOT__"
-        children[parent].append(page)
-    
-    # Trier les enfants par nav_order
-    for parent in children:
-        children[parent].sort(key=lambda p: p.nav_order)
+    if graph is None:
+        graph = DocGraph(pages)
     
     output_lines = [
         "# Documentation Navigation Tree",
@@ -131,26 +674,24 @@ def generate_tree(pages):
         ""
     ]
     
-    def render_tree(parent_key, level=0):
-        """Rendu récursif de l'arborescence"""
-        if parent_key not in children:
-            return
+    # Rendu et statistiques calculés dans le même parcours itératif
+    level_counts = []
+    for nid, level in graph.walk():
+        page = graph.nodes[nid]
+        indent = "  " * level
+        icon = "📁" if graph.has_children(nid) else "📄"
+        rel_path = page.path.relative_to(DOCS_DIR)
         
-        for page in children[parent_key]:
-            indent = "  " * level
-            icon = "📁" if page.title in children else "📄"
-            rel_path = page.path.relative_to(DOCS_DIR)
-            
-            output_lines.append(
-                f"{indent}- {icon} **{page.title}** "
-                f"(order: {page.nav_order}) → `{rel_path}`"
-            )
-            
-            # Récursion pour les enfants
-            render_tree(page.title, level + 1)
+        output_lines.append(
+            f"{indent}- {icon} **{page.title}** "
+            f"(order: {page.nav_order}) → `{rel_path}`"
+        )
+        
+        if level == len(level_counts):
+            level_counts.append(0)
+        level_counts[level] += 1
     
-    # Commencer par la racine
-    render_tree("__ROOT__")
+    per_level = ", ".join(f"{level}: {count}" for level, count in enumerate(level_counts, 1))
     
     output_lines.extend([
         "",
@@ -159,42 +700,306 @@ def generate_tree(pages):
         "## Statistics",
         "",
         f"- Total pages: {len(pages)}",
-        f"- Root pages: {len(children['__ROOT__'])}",
-        f"- Max depth: {calculate_max_depth(pages, children)}",
+        f"- Root pages: {level_counts[0] if level_counts else 0}",
+        f"- Max depth: {len(level_counts)}",
+        f"- Pages per level: {per_level or 'none'}",
     ])
     
     return "\n".join(output_lines)
 
-def calculate_max_depth(pages, children):
-    """Calcule la profondeur maximale de l'arborescence"""
-    def depth(parent_key, current=0):
-        if parent_key not in children:
-            return current
-        return max((depth(p.title, current + 1) for p in children[parent_key]), default=current)
+def build_index(graph):
+    """Index de navigation sérialisable : une entrée par page, dans l'ordre des ids"""
+    depths = [0] * len(graph.nodes)
+    for nid, level in graph.walk():
+        depths[nid] = level + 1
+    
+    parents = [-1] * len(graph.nodes)
+    for nid in range(len(graph.nodes)):
+        for child in graph.child_ids(nid):
+            parents[child] = nid
+    
+    return {
+        "version": INDEX_VERSION,
+        "roots": list(graph.child_ids(graph.root)),
+        "pages": [
+            {
+                "id": nid,
+                "title": page.title,
+                "path": page.path.relative_to(DOCS_DIR).as_posix(),
+                "parent": parents[nid] if parents[nid] >= 0 else None,
+                "nav_order": page.nav_order,
+                "depth": depths[nid],
+                "children": list(graph.child_ids(nid)),
+            }
+            for nid, page in enumerate(graph.nodes)
+        ],
+    }
+
+def pack_binary_index(graph):
+    """
+    Encodage binaire little-endian de l'index :
+
+      en-tête  <4sHHII : magic, version, réservé, nb de pages n, taille des chaînes
+      n nœuds  <iIdIIII : parent (-1 racine), depth, nav_order, title off/len, path off/len
+      u32[n+2] offsets CSR des enfants (le nœud n est la racine virtuelle)
+      u32[n]   enfants triés par nav_order
+      octets   chaînes UTF-8
+    """
+    index = build_index(graph)
+    strings = bytearray()
+    records = []
+    
+    for entry in index["pages"]:
+        if isinstance(entry["nav_order"], bool) or not isinstance(entry["nav_order"], (int, float)):
+            raise DocError(
+                f"nav_order must be numeric for the binary index: "
+                f"'{entry['title']}' has {entry['nav_order']!r}"
+            )
+        title = entry["title"].encode("utf-8")
+        rel = entry["path"].encode("utf-8")
+        records.append(INDEX_NODE.pack(
+            -1 if entry["parent"] is None else entry["parent"],
+            entry["depth"],
+            entry["nav_order"],
+            len(strings), len(title),
+            len(strings) + len(title), len(rel),
+        ))
+        strings += title + rel
+    
+    offsets = array("I", graph.offsets)
+    children = array("I", graph.children)
+    if sys.byteorder == "big":
+        offsets.byteswap()
+        children.byteswap()
+    
+    return b"".join((
+        INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, len(records), len(strings)),
+        b"".join(records),
+        offsets.tobytes(),
+        children.tobytes(),
+        bytes(strings),
+    ))
+
+def read_binary_index(path):
+    """Relit un index binaire et retourne la même structure que l'export JSON"""
+    data = path.read_bytes()
+    magic, version, _, n, strings_len = INDEX_HEADER.unpack_from(data)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        raise DocError(f"Unsupported navigation index: {path}")
+    
+    pos = INDEX_HEADER.size
+    nodes = list(INDEX_NODE.iter_unpack(data[pos:pos + n * INDEX_NODE.size]))
+    pos += n * INDEX_NODE.size
+    
+    offsets = array("I", data[pos:pos + 4 * (n + 2)])
+    pos += 4 * (n + 2)
+    children = array("I", data[pos:pos + 4 * n])
+    pos += 4 * n
+    if sys.byteorder == "big":
+        offsets.byteswap()
+        children.byteswap()
+    strings = data[pos:pos + strings_len]
+    
+    def text(offset, length):
+        return strings[offset:offset + length].decode("utf-8")
+    
+    return {
+        "version": version,
+        "roots": list(children[offsets[n]:offsets[n + 1]]),
+        "pages": [
+            {
+                "id": nid,
+                "title": text(t_off, t_len),
+                "path": text(p_off, p_len),
+                "parent": parent if parent >= 0 else None,
+                "nav_order": int(nav_order) if nav_order.is_integer() else nav_order,
+                "depth": depth,
+                "children": list(children[offsets[nid]:offsets[nid + 1]]),
+            }
+            for nid, (parent, depth, nav_order, t_off, t_len, p_off, p_len) in enumerate(nodes)
+        ],
+    }
+
+def write_outputs(pages, graph, export_json_path=None, export_binary_path=None):
+    """
+    Écrit NAVIGATION.md et, si demandés, les index JSON et binaire.
+
+    Tout est construit (et l'index binaire validé) avant la première
+    écriture : une erreur ne laisse aucune sortie partielle.
+    """
+    tree = generate_tree(pages, graph)
+    index_json = json.dumps(build_index(graph), ensure_ascii=False) if export_json_path else None
+    index_binary = pack_binary_index(graph) if export_binary_path else None
+    
+    OUTPUT_FILE.write_text(tree, encoding="utf-8")
+    if index_json is not None:
+        export_json_path.write_text(index_json, encoding="utf-8")
+    if index_binary is not None:
+        export_binary_path.write_bytes(index_binary)
+
+def scan_docs():
+    """Retourne {chemin: (mtime_ns, taille)} pour toutes les pages de docs/"""
+    sigs = {}
+    for md in DOCS_DIR.rglob("*.md"):
+        if md == OUTPUT_FILE:
+            continue
+        try:
+            st = md.stat()
+        except FileNotFoundError:
+            # Supprimé entre rglob et stat, ou lien cassé (verrou d'éditeur .#page.md)
+            continue
+        sigs[md] = (st.st_mtime_ns, st.st_size)
+    return sigs
+
+def watch(interval=WATCH_INTERVAL, max_bytes=FRONTMATTER_MAX_BYTES, exports=(None, None)):
+    """
+    Surveille docs/ par polling et régénère NAVIGATION.md à chaque changement.
+
+    Les métadonnées restent en mémoire entre deux événements : seules les
+    pages modifiées sont relues, et tant que l'arbre précédent était valide
+    seules leurs chaînes de parents, leurs enfants orphelins et leurs groupes
+    de frères sont revalidés. Aucune erreur ne termine la surveillance :
+    elle est affichée et l'arbre est régénéré au changement suivant.
+    """
+    sigs, metas, errors = {}, {}, {}
+    valid = False
     
-    return depth("__ROOT__")
+    print(f"👀 Watching {DOCS_DIR}/ for changes (Ctrl+C to stop)...")
+    try:
+        while True:
+            try:
+                current = scan_docs()
+            except OSError as e:
+                print(f"   ❌ Cannot scan {DOCS_DIR}: {e}")
+                time.sleep(interval)
+                continue
+            changed = [md for md, sig in current.items() if sigs.get(md) != sig]
+            removed = [md for md in sigs if md not in current]
+            
+            if changed or removed:
+                started = time.perf_counter()
+                old_metas = [metas.pop(md) for md in changed + removed if md in metas]
+                for md in changed + removed:
+                    errors.pop(md, None)
+                
+                for md in changed:
+                    try:
+                        metas[md] = read_page(md, max_bytes=max_bytes)[3]
+                    except Exception as e:
+                        errors[md] = e
+                sigs = current
+                
+                try:
+                    for md in current:
+                        if md in errors:
+                            raise DocError(str(errors[md]))
+                    
+                    pages = {}
+                    for md in current:
+                        add_page(pages, md, metas[md])
+                    
+                    if valid:
+                        new_metas = [metas[md] for md in changed]
+                        vanished = {m[0] for m in old_metas} - pages.keys()
+                        starts = {m[0] for m in new_metas}
+                        starts.update(t for t, p in pages.items() if p.parent in vanished)
+                        validate_hierarchy(pages, starts)
+                        groups = {m[1] or "__ROOT__" for m in old_metas + new_metas}
+                    else:
+                        validate_hierarchy(pages)
+                        groups = None
+                    
+                    graph = DocGraph(pages)
+                    validate_nav_order(pages, groups, graph)
+                    write_outputs(pages, graph, *exports)
+                    valid = True
+                    
+                    elapsed = (time.perf_counter() - started) * 1000
+                    print(f"   ✓ {len(changed) + len(removed)} change(s), "
+                          f"{OUTPUT_FILE} regenerated in {elapsed:.1f} ms")
+                except DocError as e:
+                    valid = False
+                    print(f"   ❌ Validation failed: {e}")
+                except Exception as e:
+                    valid = False
+                    print(f"   ❌ Unexpected error: {type(e).__name__}: {e}")
+            
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n👋 Watch stopped")
 
 def main():
+    parser = argparse.ArgumentParser(description="Validate docs frontmatter and generate NAVIGATION.md")
+    parser.add_argument("--cache-file", type=Path, default=CACHE_FILE,
+                        help=f"Frontmatter cache location (default: {CACHE_FILE})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-parse every page and ignore the frontmatter cache")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Worker processes for frontmatter loading (0 = one per CPU)")
+    parser.add_argument("--max-frontmatter-bytes", type=int, default=FRONTMATTER_MAX_BYTES,
+                        help="Fail if a page's closing '---' is not found within this many bytes")
+    
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and regenerate the navigation tree on every change "
+                             "(metadata stays in memory: the frontmatter cache is not used; "
+                             "not combinable with --check-links or --jobs)")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL,
+                        help=f"Polling interval in seconds for --watch (default: {WATCH_INTERVAL})")
+    parser.add_argument("--check-links", action="store_true",
+                        help="Also check relative links and anchors between docs pages")
+    parser.add_argument("--export-json", type=Path,
+                        help="Also write the validated page hierarchy as a JSON index")
+    parser.add_argument("--export-binary", type=Path,
+                        help="Also write the validated page hierarchy as a compact binary index")
+    
+    args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+    
+    if args.watch and args.check_links:
+        parser.error("--check-links is not supported with --watch")
+    if args.watch and args.jobs != 1:
+        parser.error("--jobs is not supported with --watch")
+    
+    if args.watch:
+        watch(args.interval, args.max_frontmatter_bytes, (args.export_json, args.export_binary))
+        return
+    
     try:
         print("🔍 Loading pages...")
-        pages = load_pages()
-        print(f"   ✓ {len(pages)} pages loaded")
+        cache = None if args.no_cache else FrontmatterCache(args.cache_file)
+        links = LinkIndex() if args.check_links else None
+        pages = load_pages(cache, jobs, args.max_frontmatter_bytes, links)
+        if cache is not None:
+            # La validation peut encore échouer, mais les entrées parsées restent valides
+            cache.save()
+            print(f"   ✓ {len(pages)} pages loaded ({cache.hits} cached, {cache.misses} parsed)")
+        else:
+            print(f"   ✓ {len(pages)} pages loaded")
         
         print("\n🔍 Validating structure...")
-        validate_parents(pages)
+        validate_hierarchy(pages)
         print("   ✓ Parents are valid")
-        
-        detect_cycles(pages)
         print("   ✓ No cycles detected")
         
-        validate_nav_order(pages)
+        graph = DocGraph(pages)
+        validate_nav_order(pages, graph=graph)
         print("   ✓ nav_order values are unique per parent")
         
-        print("\n📝 Generating navigation tree...")
-        tree_content = generate_tree(pages)
+        if links is not None:
+            print("\n🔗 Checking internal links...")
+            broken = links.broken()
+            for source, line, target, reason in broken:
+                print(f"   ✗ {source}:{line} → {target} ({reason})")
+            if broken:
+                raise DocError(f"{len(broken)} broken internal link(s)")
+            print(f"   ✓ {links.count()} internal links are valid")
         
-        OUTPUT_FILE.write_text(tree_content, encoding="utf-8")
+        print("\n📝 Generating navigation tree...")
+        write_outputs(pages, graph, args.export_json, args.export_binary)
         print(f"   ✓ Navigation tree written to {OUTPUT_FILE}")
+        for export in (args.export_json, args.export_binary):
+            if export:
+                print(f"   ✓ Navigation index written to {export}")
         
         print("\n✅ Documentation navigation is valid and tree generated successfully")
         